@@ -0,0 +1,98 @@
+"""
+Multi-day FTSE analysis.
+
+`backtest` runs the `tidy_data -> format_change_values -> sector -> investigate`
+chain for every trading day of a backtest, spreading the daily files across
+a process pool. Each day produces small partial aggregates (per-sector sums
+and counts of `Change (%)`, per-company `Beat Sector` counts) which are
+merged into the cross-day results, so the work done per day does not depend
+on how many days there are or on which worker processed them.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pandas as pd
+
+from ftse import RAW_DTYPES, format_change_values, investigate, sector, tidy_data
+from ftse_cache import load_ftse
+
+
+def analyse_day(path, wl=(), cache_dir=None):
+    """Run the daily analysis chain on a raw FTSE snapshot CSV.
+
+    :param path: path of the raw CSV file for the day
+    :type path: str
+    :param wl: watchlist as described in `investigate`
+    :type wl: list
+    :param cache_dir: if given, load the tidied frame through the cache of `ftse_cache` in that directory
+    :type cache_dir: str
+    :return: a dictionary with the companies returned by `investigate` (`investigate`), and the partial
+        aggregates of the day: sum and count of `Change (%)` per sector (`sector_change`), number of days each
+        company beat its sector and number of days it was listed (`beats`)
+    :rtype: dict
+    """
+
+    if cache_dir is None:
+        df = format_change_values(tidy_data(pd.read_csv(path, dtype=RAW_DTYPES)))
+    else:
+        df = load_ftse(path, cache_dir)
+
+    df = sector(df)
+
+    return {'investigate': investigate(df, wl),
+            'sector_change': df.groupby('Sector')['Change (%)'].agg(['sum', 'count']),
+            'beats': df.groupby('Company')['Beat Sector'].agg(['sum', 'count'])}
+
+
+def merge_partials(partials):
+    """Merge the partial aggregates of several days, as returned by `analyse_day`.
+
+    :param partials: partial aggregates (DataFrames with `sum` and `count` columns, indexed by sector or company)
+    :type partials: iterable of pd.DataFrame
+    :return: merged aggregates
+    :rtype: pd.DataFrame
+    """
+
+    merged = pd.DataFrame(columns=['sum', 'count'], dtype=float)
+    for partial_aggregate in partials:
+        merged = merged.add(partial_aggregate, fill_value=0)
+
+    return merged
+
+
+def backtest(days, wl=(), max_workers=None, cache_dir=None):
+    """Analyse many trading days in parallel.
+
+    :param days: dictionary mapping each day to the path of its raw CSV file, or a list of paths (in which case
+        each path is used as the day)
+    :type days: dict | list
+    :param wl: watchlist as described in `investigate`
+    :type wl: list
+    :param max_workers: number of worker processes (defaults to the number of CPUs)
+    :type max_workers: int
+    :param cache_dir: if given, load the tidied frames through the cache of `ftse_cache` in that directory
+    :type cache_dir: str
+    :return: a dictionary with:
+        - `days`: the result of `analyse_day` for each day
+        - `sector_change`: mean `Change (%)` per sector, one row per day
+        - `sector_mean`: mean `Change (%)` per sector over all days
+        - `beat_frequency`: fraction of days on which each company beat its sector
+    :rtype: dict
+    """
+
+    if not isinstance(days, dict):
+        days = {path: path for path in days}
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = dict(zip(days, executor.map(partial(analyse_day, wl=wl, cache_dir=cache_dir), days.values())))
+
+    sector_change = pd.DataFrame({day: result['sector_change']['sum'] / result['sector_change']['count']
+                                  for day, result in results.items()}).T
+    sector_totals = merge_partials(result['sector_change'] for result in results.values())
+    beat_totals = merge_partials(result['beats'] for result in results.values())
+
+    return {'days': results,
+            'sector_change': sector_change,
+            'sector_mean': sector_totals['sum'] / sector_totals['count'],
+            'beat_frequency': beat_totals['sum'] / beat_totals['count']}
@@ -0,0 +1,267 @@
+"""
+Benchmarks for the FTSE module, run on frames built by `synthetic`.
+
+    python benchmark.py suite [--sizes 100 10000 1000000] [--update-baseline]
+
+Times every public function of `ftse.py` at each size (the median of
+several calls) and records its peak traced memory. The figures are compared
+against the baselines stored in `benchmark_baseline.json` (recorded on the
+first run, or with `--update-baseline`), and the run fails if any of them
+regressed by more than the tolerance. Timings under MIN_SECONDS are too
+noisy to be compared.
+
+    python benchmark.py rowwise [--rows 1000000]
+
+Times `format_change_values` and `sector` against the original row-wise
+(`df.apply(..., axis=1)`) implementations and checks that both produce
+exactly the same output.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+import ftse
+from synthetic import make_ftse_frame
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# Timings below this (in seconds) are too noisy to be compared against the baseline.
+MIN_SECONDS = 0.02
+
+# Number of timed calls per case, of which the median is kept, for small (up to 10,000 rows) and large frames.
+REPEAT_SMALL = 15
+REPEAT_LARGE = 3
+
+
+def format_change_values_rowwise(df):
+    """Original row-wise `format_change_values`, kept as the reference implementation."""
+
+    def munge_changes(row):
+        if '-' in row['Change']:
+            return float(row['Change'][:-1])
+        else:
+            return round(float(row['Change']) * 100, 2)
+
+    df['Change (%)'] = df.apply(munge_changes, axis=1)
+    df['Mid-price (p)'] = df['Mid-price (p)'].str.replace(',',
+                                                          '').astype(float)
+
+    return df.drop(columns=['Change'])
+
+
+def sector_rowwise(df):
+    """Original row-wise `sector`, kept as the reference implementation."""
+
+    df['Avg. Sector Change (%)'] = df.groupby(
+        'Sector')['Change (%)'].transform(pd.Series.mean)
+    df['Beat Sector'] = df.apply(
+        lambda x: x['Change (%)'] > x['Avg. Sector Change (%)'], axis=1)
+    df['Buy Ratio'] = df.apply(
+        lambda x: x['Buy'] / x['Brokers'] if x['Brokers'] > 0 else 0, axis=1)
+
+    df['Avg. Sector Change (%)'] = df['Avg. Sector Change (%)'].round(
+        decimals=3)
+
+    return df.filter(['Company', 'Mid-price (p)', 'Sector', 'Change (%)', 'Avg. Sector Change (%)',
+                      'Our view', 'Beat Sector', 'Buy Ratio'])
+
+
+def _timed(func, df):
+    start = time.perf_counter()
+    result = func(df)
+    return result, time.perf_counter() - start
+
+
+def run_rowwise(rows):
+    """Time the row-wise and columnar implementations on `rows` rows and check that their outputs are identical.
+
+    :param rows: number of rows to benchmark with
+    :type rows: int
+    :return: timings in seconds, keyed by (function, implementation)
+    :rtype: dict
+    :raise AssertionError: if the two implementations disagree
+    """
+
+    raw = ftse.tidy_data(make_ftse_frame(rows))
+    timings = {}
+
+    expected, timings['format_change_values', 'rowwise'] = _timed(format_change_values_rowwise, raw.copy())
+    actual, timings['format_change_values', 'columnar'] = _timed(ftse.format_change_values, raw.copy())
+    pd.testing.assert_frame_equal(actual, expected)
+
+    expected, timings['sector', 'rowwise'] = _timed(sector_rowwise, expected.copy())
+    actual, timings['sector', 'columnar'] = _timed(ftse.sector, actual.copy())
+    pd.testing.assert_frame_equal(actual, expected)
+
+    return timings
+
+
+def _cases(rows, workdir):
+    """Return (name, setup, call) for every public function of `ftse`, where `call(setup())` runs it once."""
+
+    raw = make_ftse_frame(rows)
+    tidy = ftse.tidy_data(raw.copy())
+    formatted = ftse.format_change_values(tidy.copy())
+    sectors = ftse.sector(formatted.copy())
+
+    path = os.path.join(workdir, f'ftse-{rows}.csv')
+    raw.to_csv(path, index=False)
+    dest = os.path.join(workdir, f'ftse-{rows}-out.csv')
+
+    tickers = formatted['Ticker'].tolist()
+    companies = formatted['Company'].tolist()
+    portfolio = [(tickers[i], 100, 500.0) for i in range(0, len(tickers), max(1, len(tickers) // 20))]
+    portfolios = [portfolio] * 100
+    wl = [(companies[i], 1000.0) for i in range(0, len(companies), max(1, len(companies) // 20))]
+    watchlists = {f'wl{i}': wl for i in range(100)}
+    tracker = ftse.SectorTracker(sectors, wl)
+
+    return [
+        ('tidy_data', raw.copy, ftse.tidy_data),
+        ('tidy_data[low_memory]', raw.copy, lambda df: ftse.tidy_data(df, low_memory=True)),
+        ('format_change_values', tidy.copy, ftse.format_change_values),
+        ('format_change_values[low_memory]', tidy.copy,
+         lambda df: ftse.format_change_values(df, low_memory=True)),
+        ('read_ftse_chunks', lambda: path, lambda src: sum(len(chunk) for chunk in ftse.read_ftse_chunks(src))),
+        ('write_ftse_chunks', lambda: path, lambda src: ftse.write_ftse_chunks(src, dest)),
+        ('portfolio_overview', lambda: formatted, lambda df: ftse.portfolio_overview(df, portfolio)),
+        ('portfolio_overview_many', lambda: formatted, lambda df: ftse.portfolio_overview_many(df, portfolios)),
+        ('sector', formatted.copy, ftse.sector),
+        ('sector[low_memory]', formatted.copy, lambda df: ftse.sector(df, low_memory=True)),
+        ('compact', formatted.copy, ftse.compact),
+        ('bytes_per_row', lambda: sectors, ftse.bytes_per_row),
+        ('investigate', lambda: sectors, lambda df: ftse.investigate(df, wl)),
+        ('screen_watchlists', lambda: sectors, lambda df: ftse.screen_watchlists(df, watchlists)),
+        ('SectorTracker', lambda: sectors, lambda df: ftse.SectorTracker(df, wl)),
+        ('SectorTracker.update', lambda: companies[0], lambda company: tracker.update(company, change=1.0)),
+    ]
+
+
+def _measure(setup, call, repeat):
+    """Return the median time (in seconds) of `repeat` calls, and the peak traced memory (in bytes) of one call."""
+
+    timings = []
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        call(arg)
+        timings.append(time.perf_counter() - start)
+
+    arg = setup()
+    tracemalloc.start()
+    call(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return statistics.median(timings), peak
+
+
+def run_suite(sizes):
+    """Run every benchmark case at every size.
+
+    :param sizes: numbers of rows to benchmark with
+    :type sizes: list of int
+    :return: {size: {case: {'seconds': float, 'peak_bytes': int}}}
+    :rtype: dict
+    """
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in sizes:
+            repeat = REPEAT_SMALL if rows <= 10_000 else REPEAT_LARGE
+            results[str(rows)] = {}
+            for name, setup, call in _cases(rows, workdir):
+                seconds, peak = _measure(setup, call, repeat)
+                results[str(rows)][name] = {'seconds': seconds, 'peak_bytes': peak}
+                print(f'{rows:>9} {name:<34} {seconds * 1000:10.2f} ms  {peak / 1024 ** 2:9.2f} MiB', flush=True)
+
+    return results
+
+
+def regressions(results, baseline, tolerance):
+    """Compare benchmark results against a baseline.
+
+    :param results: results of `run_suite`
+    :type results: dict
+    :param baseline: results of an earlier `run_suite`
+    :type baseline: dict
+    :param tolerance: allowed ratio between a result and its baseline
+    :type tolerance: float
+    :return: descriptions of the figures which regressed
+    :rtype: list of str
+    """
+
+    failures = []
+    for rows, cases in results.items():
+        for name, figures in cases.items():
+            expected = baseline.get(rows, {}).get(name)
+            if expected is None:
+                continue
+            for metric, value in figures.items():
+                reference = expected[metric]
+                if metric == 'seconds':
+                    # Both sides are raised to the noise floor, so a timing near it cannot fail on noise alone.
+                    value, reference = max(value, MIN_SECONDS), max(reference, MIN_SECONDS)
+                if value > reference * tolerance:
+                    failures.append(f'{name} at {rows} rows: {metric} {value:.6g} > {reference:.6g} x {tolerance}')
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    suite = commands.add_parser('suite', help='time every public function against the stored baselines')
+    suite.add_argument('--sizes', type=int, nargs='+', default=[100, 10_000, 1_000_000])
+    suite.add_argument('--baseline', default=BASELINE_FILE)
+    suite.add_argument('--tolerance', type=float, default=1.5)
+    suite.add_argument('--update-baseline', action='store_true')
+
+    rowwise = commands.add_parser('rowwise', help='compare the columnar pipeline with the row-wise original')
+    rowwise.add_argument('--rows', type=int, default=1_000_000)
+
+    args = parser.parse_args()
+
+    if args.command == 'rowwise':
+        timings = run_rowwise(args.rows)
+        for name in ('format_change_values', 'sector'):
+            rowwise = timings[name, 'rowwise']
+            columnar = timings[name, 'columnar']
+            print(f'{name:<22} rowwise {rowwise:8.3f}s  columnar {columnar:8.3f}s  '
+                  f'speedup {rowwise / columnar:6.1f}x')
+        return
+
+    results = run_suite(args.sizes)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    if args.update_baseline or not baseline:
+        for rows, cases in results.items():
+            baseline.setdefault(rows, {}).update(cases)
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+        print(f'Baseline written to {args.baseline}')
+        return
+
+    failures = regressions(results, baseline, args.tolerance)
+    if failures:
+        print('REGRESSIONS:', *failures, sep='\n  ')
+        sys.exit(1)
+
+    print('No regressions against the baseline')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,21 @@
+from collections import defaultdict
+
+import numpy as np
 import pandas as pd
 
+# Columns which `format_change_values` parses as text. They are read as strings explicitly so that a chunk
+# without any `%` or thousands separator is not inferred as numeric.
+RAW_DTYPES = {'Change': str, 'Mid-price (p)': str}
+
+# Columns holding a small set of repeated strings, stored as categoricals in low-memory mode.
+CATEGORICAL_COLUMNS = ['Ticker', 'Company', 'Sector', 'Our view']
+
+# Float columns which low-memory mode may store as float32. Only derived columns which no later computation reads
+# (valuations, sector averages and screens all read `Mid-price (p)`, `Change (%)` and `Buy Ratio` at full precision).
+FLOAT32_COLUMNS = ['Avg. Sector Change (%)']
 
-def tidy_data(df):
+
+def tidy_data(df, low_memory=False):
     """The dataset we are interested in has a column with only `n/a` values,
     and also 101 rows (you may have been expecting 100!).
 
@@ -13,16 +27,24 @@ def tidy_data(df):
     - Drop the row with a `Ticker` value of `RDSA`
     - Return the modified DataFrame
 
+    With `low_memory`, `df` is modified in place instead of being copied, and is then compacted (see `compact`).
+
     :param df: a DataFrame we want to tidy
     :type df: pd.DataFrame
+    :param low_memory: tidy and compact `df` in place
+    :type low_memory: bool
     :return: a new DataFrame that has been cleaned as above
     :rtype: pd.DataFrame
     """
 
+    if low_memory:
+        df.drop(index=df.index[df['Ticker'] == 'RDSA'], columns=['Strong Buy'], inplace=True)
+        return compact(df)
+
     return df.drop(df[df['Ticker'] == 'RDSA'].index).drop(columns=['Strong Buy'])
 
 
-def format_change_values(df):
+def format_change_values(df, low_memory=False):
     """Take a look at the values in the `Change` column.
     You'll see that they are in an inconsistent format, and stored as strings.
     The positive values need to be multiplied by 100, and rounded to two decimal places.
@@ -43,25 +65,72 @@ def format_change_values(df):
     - Convert the values in the `Mid-price (p)` column to floats (keeping the column in the same place)
     - Return the modified DataFrame
 
+    With `low_memory`, the `Change` column is dropped in place instead of returning a copy, and the result is
+    compacted (see `compact`).
+
     :param df:  a DataFrame pre-tidied by previous function
     :type df: pd.DataFrame
+    :param low_memory: format and compact `df` in place
+    :type low_memory: bool
     :return: modified DataFrame
     :rtype: pd.DataFrame
     """
 
-    def munge_changes(row):
-        if '-' in row['Change']:
-            return float(row['Change'][:-1])
-        else:
-            return round(float(row['Change']) * 100, 2)
-
-    df['Change (%)'] = df.apply(munge_changes, axis=1)
+    change = df['Change']
+    negative = change.str.contains('-', regex=False).to_numpy(dtype=bool)
+    values = np.where(negative, change.str[:-1], change).astype(float)
+    df['Change (%)'] = np.where(negative, values, np.round(values * 100, 2))
     df['Mid-price (p)'] = df['Mid-price (p)'].str.replace(',',
                                                           '').astype(float)
 
+    if low_memory:
+        df.drop(columns=['Change'], inplace=True)
+        return compact(df)
+
     return df.drop(columns=['Change'])
 
 
+def read_ftse_chunks(path, chunksize=100_000):
+    """Stream a raw FTSE snapshot CSV as tidied and normalised chunks.
+
+    The file is read `chunksize` rows at a time and each chunk goes through `tidy_data` and
+    `format_change_values` before being yielded, so peak memory is bounded by the chunk size rather than the
+    size of the file.
+
+    :param path: path (or buffer) of the raw CSV file
+    :type path: str
+    :param chunksize: number of rows to read at a time
+    :type chunksize: int
+    :return: normalised chunks, in file order
+    :rtype: iterator of pd.DataFrame
+    """
+
+    with pd.read_csv(path, dtype=RAW_DTYPES, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield format_change_values(tidy_data(chunk))
+
+
+def write_ftse_chunks(path, dest, chunksize=100_000):
+    """Normalise a raw FTSE snapshot CSV chunk by chunk and write the result to `dest` as CSV.
+
+    :param path: path (or buffer) of the raw CSV file
+    :type path: str
+    :param dest: path (or buffer) of the CSV file to write
+    :type dest: str
+    :param chunksize: number of rows to read at a time
+    :type chunksize: int
+    :return: number of rows written
+    :rtype: int
+    """
+
+    rows = 0
+    for chunk in read_ftse_chunks(path, chunksize):
+        chunk.to_csv(dest, mode='a' if rows else 'w', header=not rows, index=False)
+        rows += len(chunk)
+
+    return rows
+
+
 def portfolio_overview(df, portfolio):
     """Let's say we are given the details of a portfolio of shares in a list of tuples,
     each containing the company ticker code, number of shares, and price paid, such as the one below:
@@ -94,27 +163,76 @@ def portfolio_overview(df, portfolio):
     :type portfolio: list of tuples
     :return: dictionary with attributes described above
     :rtype: dict
+    :raise KeyError: if a holding refers to a ticker which is not in the dataset
+    :raise ZeroDivisionError: if the portfolio cost nothing (e.g. it is empty)
     """
 
-    profits = set()
-    total_cost = 0.0
-    value = 0.0
+    overview = portfolio_overview_many(df, [portfolio])[0]
+    if not overview['portfolio_cost']:
+        raise ZeroDivisionError("Portfolio cost is zero, change in value is undefined")
+
+    return overview
+
+
+def portfolio_overview_many(df, portfolios):
+    """Value many portfolios against the same dataset in one pass.
+
+    Each portfolio is a list of tuples as accepted by `portfolio_overview`. The `Mid-price (p)` of every ticker
+    is looked up once through a Ticker-indexed price table (the first row wins if a ticker is listed twice),
+    then the cost, value and profit of every holding of every portfolio are computed as whole-column operations.
+    The costs and values are then added up in holding order, one after the other, so that each portfolio gets
+    exactly the same totals as with `portfolio_overview`.
+
+    `portfolios` can be either a list of portfolios, in which case a list of results is returned in the same
+    order, or a dictionary mapping a name to a portfolio, in which case a dictionary with the same keys is
+    returned. Each result is a dictionary as returned by `portfolio_overview`, except that the `change_in_value`
+    of a portfolio which cost nothing (e.g. an empty one) is NaN rather than an error, so that it does not
+    prevent valuing the others.
+
+    :param df: DataFrame processed with `tidy_data` and `format_change_values`
+    :type df: pd.DataFrame
+    :param portfolios: portfolios to value
+    :type portfolios: list of lists of tuples | dict
+    :return: one dictionary per portfolio, with the keys described in `portfolio_overview`
+    :rtype: list of dicts | dict
+    :raise KeyError: if any holding refers to a ticker which is not in the dataset
+    """
 
-    for item in portfolio:
-        cost = item[1] * item[2]
-        total_cost += cost
-        price = df[df['Ticker'] == item[0]]['Mid-price (p)'].values[0]
-        value += item[1] * price
-        if price > item[2]:
-            profits.add(item[0])
+    names = list(portfolios) if isinstance(portfolios, dict) else list(range(len(portfolios)))
+    books = portfolios.values() if isinstance(portfolios, dict) else portfolios
 
-    return {'portfolio_cost': total_cost/100,
-            'portfolio_value': value/100,
-            'change_in_value': round(((value - total_cost)/total_cost) * 100, 1),
-            'profit': profits}
+    holdings = pd.DataFrame([(name, *item) for name, book in zip(names, books) for item in book],
+                            columns=['Portfolio', 'Ticker', 'Shares', 'Paid'])
+    prices = df.drop_duplicates('Ticker').set_index('Ticker')['Mid-price (p)']
+    holdings['Price'] = holdings['Ticker'].map(prices)
 
+    unknown = holdings.loc[holdings['Price'].isna(), 'Ticker'].unique()
+    if len(unknown):
+        raise KeyError(f"Unknown tickers: {', '.join(map(str, unknown))}")
 
-def sector(df):
+    holdings['Cost'] = holdings['Shares'] * holdings['Paid']
+    holdings['Value'] = holdings['Shares'] * holdings['Price']
+
+    totals = {name: [0.0, 0.0] for name in names}
+    for name, cost, value in zip(holdings['Portfolio'], holdings['Cost'].tolist(), holdings['Value'].tolist()):
+        total = totals[name]
+        total[0] += cost
+        total[1] += value
+    profits = holdings[holdings['Price'] > holdings['Paid']].groupby('Portfolio', sort=False)['Ticker'].agg(set)
+
+    results = []
+    for name in names:
+        total_cost, value = totals[name]
+        change = round(((value - total_cost)/total_cost) * 100, 1) if total_cost else float('nan')
+        results.append({'portfolio_cost': total_cost/100,
+                        'portfolio_value': value/100,
+                        'change_in_value': change,
+                        'profit': profits.get(name, set())})
+
+    return dict(zip(names, results)) if isinstance(portfolios, dict) else results
+
+
+def sector(df, low_memory=False):
     """We're provided with a tidied DataFrame of the FTSE data (such as the one returned after the first two functions).
     We would like to compare the % change in the mid-price for each company to the average % change for all companies in
     the sector,
@@ -132,24 +250,77 @@ def sector(df):
         `Avg. Sector Change (%)`
         - Buy Ratio    # This should equal the `Buy` column divided by the `Brokers` column.
 
+    With `low_memory`, the other columns are dropped from `df` in place instead of filtering them into a copy, and
+    the result (with the columns in the same order) is compacted (see `compact`), keeping the three decimal places of
+    `Avg. Sector Change (%)`.
+
     :param df: DataFrame processed with first two functions
     :type df: pd.DataFrame
+    :param low_memory: add the columns to `df` and compact it in place
+    :type low_memory: bool
     :return: new DataFrame with columns described above
     :rtype: pd.DataFrame
     """
 
     df['Avg. Sector Change (%)'] = df.groupby(
-        'Sector')['Change (%)'].transform(pd.Series.mean)
-    df['Beat Sector'] = df.apply(
-        lambda x: x['Change (%)'] > x['Avg. Sector Change (%)'], axis=1)
-    df['Buy Ratio'] = df.apply(
-        lambda x: x['Buy'] / x['Brokers'] if x['Brokers'] > 0 else 0, axis=1)
+        'Sector', observed=True)['Change (%)'].transform(pd.Series.mean)
+    df['Beat Sector'] = df['Change (%)'] > df['Avg. Sector Change (%)']
+    df['Buy Ratio'] = (df['Buy'] / df['Brokers']).where(df['Brokers'] > 0, 0)
 
     df['Avg. Sector Change (%)'] = df['Avg. Sector Change (%)'].round(
         decimals=3)
 
-    return df.filter(['Company', 'Mid-price (p)', 'Sector', 'Change (%)', 'Avg. Sector Change (%)',
-                      'Our view', 'Beat Sector', 'Buy Ratio'])
+    columns = ['Company', 'Mid-price (p)', 'Sector', 'Change (%)', 'Avg. Sector Change (%)',
+               'Our view', 'Beat Sector', 'Buy Ratio']
+
+    if low_memory:
+        df.drop(columns=df.columns.difference(columns), inplace=True)
+        return compact(df[columns], decimals=3)
+
+    return df.filter(columns)
+
+
+def compact(df, decimals=2):
+    """Reduce the memory footprint of an FTSE DataFrame in place, for the low-memory mode of the functions above.
+
+    - The repeated string columns (`Ticker`, `Company`, `Sector`, `Our view`) become categoricals
+    - Integer columns are downcast to the smallest integer type holding their values
+    - Float columns listed in `FLOAT32_COLUMNS` become float32 when every value is unchanged to `decimals` decimal
+      places after the conversion; the other float columns stay float64, since the arithmetic done on them later
+      (e.g. multiplying prices by share counts) would carry the float32 error
+
+    :param df: DataFrame at any stage of the pipeline
+    :type df: pd.DataFrame
+    :param decimals: number of decimal places float columns must keep
+    :type decimals: int
+    :return: `df`, compacted
+    :rtype: pd.DataFrame
+    """
+
+    for name in df.columns:
+        values = df[name]
+        if name in CATEGORICAL_COLUMNS and not isinstance(values.dtype, pd.CategoricalDtype):
+            df[name] = values.astype('category')
+        elif pd.api.types.is_integer_dtype(values):
+            df[name] = pd.to_numeric(values, downcast='integer')
+        elif name in FLOAT32_COLUMNS and pd.api.types.is_float_dtype(values) and values.dtype != np.float32:
+            narrow = values.astype(np.float32)
+            if np.array_equal(narrow.astype(float).round(decimals), values.round(decimals), equal_nan=True):
+                df[name] = narrow
+
+    return df
+
+
+def bytes_per_row(df):
+    """Return the memory used by a DataFrame per row, including the strings held by object and categorical columns.
+
+    :param df: a DataFrame
+    :type df: pd.DataFrame
+    :return: number of bytes per row
+    :rtype: float
+    """
+
+    return df.memory_usage(deep=True).sum() / len(df)
 
 
 def investigate(df, wl):
@@ -176,8 +347,190 @@ def investigate(df, wl):
     :rtype: list of company names (as string)
     """
 
-    wl_filter = [item[0] for item in wl if not df[(
-        df['Company'] == item[0]) & (df['Mid-price (p)'] <= item[1])].empty]
-    buy_filter = list(df[(~df['Beat Sector']) & (df['Our view'] == 'Buy') & (
-        df['Buy Ratio'] >= 0.5)]['Company'].values)
-    return pd.Series(wl_filter + buy_filter).drop_duplicates().tolist()
+    return screen_watchlists(df, {'watchlist': wl})['watchlist']
+
+
+def screen_watchlists(df, watchlists, beat_sector=False, view='Buy', min_buy_ratio=0.5):
+    """Apply the rules of `investigate` to many watchlists at once.
+
+    All watchlist entries are flattened into a single frame and joined against a Company-indexed view of `df`,
+    so rule (i) is evaluated for every watchlist in one pass instead of one scan of the frame per entry.
+    Rule (ii) does not depend on the watchlist and is evaluated once.
+
+    For each watchlist, the result lists the watchlist hits in watchlist order followed by the rule (ii) hits in
+    the order of `df`, without duplicates, which is what `investigate` returns for a single watchlist.
+
+    :param df: DataFrame as returned by `sector`
+    :type df: pd.DataFrame
+    :param watchlists: watchlists (as described in `investigate`) keyed by name
+    :type watchlists: dict
+    :param beat_sector: value of `Beat Sector` required by rule (ii)
+    :type beat_sector: bool
+    :param view: value of `Our view` required by rule (ii)
+    :type view: str
+    :param min_buy_ratio: minimum `Buy Ratio` required by rule (ii)
+    :type min_buy_ratio: float
+    :return: list of companies meeting either requirement, keyed by watchlist name
+    :rtype: dict
+    """
+
+    entries = pd.DataFrame([(name, position, *item) for name, wl in watchlists.items()
+                            for position, item in enumerate(wl)],
+                           columns=['Watchlist', 'Position', 'Company', 'Target'])
+    prices = df.set_index('Company')['Mid-price (p)']
+
+    hits = entries.join(prices, on='Company', how='inner')
+    hits = hits[hits['Mid-price (p)'] <= hits['Target']].drop_duplicates(['Watchlist', 'Position'])
+
+    buy_filter = list(df[(df['Beat Sector'] == beat_sector) & (df['Our view'] == view) & (
+        df['Buy Ratio'] >= min_buy_ratio)]['Company'].values)
+
+    wl_filters = {name: list(companies) for name, companies in hits.groupby('Watchlist', sort=False)['Company']}
+    return {name: list(dict.fromkeys(wl_filters.get(name, []) + buy_filter)) for name in watchlists}
+
+
+class SectorTracker:
+    """Incrementally maintained version of `sector` and `investigate` for a live price feed.
+
+    The tracker is seeded with a DataFrame as returned by `sector` and keeps the `Change (%)` values of each
+    sector in an array, so updating a single company only touches its sector: the sector mean is recomputed
+    from the values (summed in the same order and the same way as the mean of `sector`, so no error builds
+    up over many ticks and `Beat Sector` always agrees with `sector`), only the companies of that sector are
+    compared against it, and only the rows whose state changed are reported.
+
+    The `investigate` rules are tracked the same way: after each update, the tracker reports the companies
+    which started or stopped meeting either rule.
+
+    E.g.:
+
+        tracker = SectorTracker(sector(df), wl)
+        flips, alerts = tracker.update('TUI', change=-1.25)
+
+    :param df: DataFrame as returned by `sector`
+    :type df: pd.DataFrame
+    :param wl: watchlist as described in `investigate`
+    :type wl: list
+    """
+
+    def __init__(self, df, wl=()):
+        self._rows = {}
+        self._members = defaultdict(list)
+        self._positions = {}
+
+        for row in df[['Company', 'Mid-price (p)', 'Sector', 'Change (%)', 'Our view', 'Buy Ratio']].itertuples(
+                index=False, name=None):
+            company, price, sector_name, change, view, buy_ratio = row
+            self._rows[company] = {'Mid-price (p)': price, 'Sector': sector_name, 'Change (%)': change,
+                                   'Our view': view, 'Buy Ratio': buy_ratio}
+            self._positions[company] = len(self._members[sector_name])
+            self._members[sector_name].append(company)
+
+        self._targets = {}
+        for company, target in wl:
+            self._targets[company] = max(target, self._targets.get(company, target))
+
+        self._changes = {sector_name: np.array([self._rows[member]['Change (%)'] for member in members],
+                                               dtype=float)
+                         for sector_name, members in self._members.items()}
+
+        averages = {sector_name: self.average(sector_name) for sector_name in self._members}
+        self._beat = {company: self._beats(company, averages[row['Sector']]) for company, row in self._rows.items()}
+        self._flagged = {company for company in self._rows if self._matches(company)}
+
+    def _beats(self, company, average):
+        return bool(self._rows[company]['Change (%)'] > average)
+
+    def _matches(self, company):
+        row = self._rows[company]
+        on_watchlist = company in self._targets and row['Mid-price (p)'] <= self._targets[company]
+        buy = not self._beat[company] and row['Our view'] == 'Buy' and row['Buy Ratio'] >= 0.5
+        return bool(on_watchlist or buy)
+
+    def average(self, sector_name):
+        """Return the current `Avg. Sector Change (%)` of a sector (unrounded).
+
+        :param sector_name: name of the sector
+        :type sector_name: str
+        :return: mean `Change (%)` of the companies in the sector
+        :rtype: float
+        """
+
+        changes = self._changes.get(sector_name)
+        if changes is None:
+            return float('nan')
+
+        # Same as pd.Series.mean: NaNs are skipped by summing zeros in their place.
+        known = ~np.isnan(changes)
+        count = known.sum()
+        if not count:
+            return float('nan')
+
+        return float(np.where(known, changes, 0).sum() / count)
+
+    def update(self, company, change=None, price=None):
+        """Apply a tick for a single company.
+
+        :param company: name of the company
+        :type company: str
+        :param change: new `Change (%)`, if it changed
+        :type change: float
+        :param price: new `Mid-price (p)`, if it changed
+        :type price: float
+        :return: `Beat Sector` flips in the affected sector and `investigate` alerts, both as dictionaries
+            mapping a company to its new state (`True` for a company which now meets one of the rules)
+        :rtype: dict, dict
+        :raise KeyError: if the company is not tracked
+        """
+
+        row = self._rows[company]
+        changed = {company}
+        flips = {}
+
+        if price is not None:
+            row['Mid-price (p)'] = price
+
+        if change is not None:
+            row['Change (%)'] = change
+            self._changes[row['Sector']][self._positions[company]] = change
+
+            average = self.average(row['Sector'])
+            for member in self._members[row['Sector']]:
+                beat = self._beats(member, average)
+                if beat != self._beat[member]:
+                    self._beat[member] = flips[member] = beat
+                    changed.add(member)
+
+        alerts = {}
+        for member in changed:
+            flagged = self._matches(member)
+            if flagged != (member in self._flagged):
+                alerts[member] = flagged
+                if flagged:
+                    self._flagged.add(member)
+                else:
+                    self._flagged.discard(member)
+
+        return flips, alerts
+
+    def flagged(self):
+        """Return the companies currently meeting either `investigate` rule, in tracking order.
+
+        :return: list of company names
+        :rtype: list
+        """
+
+        return [company for company in self._rows if company in self._flagged]
+
+    def to_frame(self):
+        """Return the tracked state as a DataFrame with the same columns as `sector`.
+
+        :return: DataFrame as returned by `sector`
+        :rtype: pd.DataFrame
+        """
+
+        df = pd.DataFrame.from_dict(self._rows, orient='index').rename_axis('Company').reset_index()
+        df['Avg. Sector Change (%)'] = df['Sector'].map(self.average).round(decimals=3)
+        df['Beat Sector'] = df['Company'].map(self._beat)
+
+        return df.filter(['Company', 'Mid-price (p)', 'Sector', 'Change (%)', 'Avg. Sector Change (%)',
+                          'Our view', 'Beat Sector', 'Buy Ratio'])
@@ -0,0 +1,228 @@
+"""
+On-disk cache of the tidied FTSE frame.
+
+`load_ftse` reads a raw FTSE snapshot CSV, runs it through `tidy_data` and
+`format_change_values`, and stores the result in a cache directory as one
+NumPy `.npy` file per column (string columns as integer codes into a file
+of their distinct values, encoded in UTF-8). Later calls for the same, unchanged, source
+file load the columns back (memory-mapped by default) instead of parsing
+the CSV again.
+
+Cache entries are keyed by a fingerprint of the source file: its path, size
+and modification time by default, or a hash of its content (in which case
+files with the same content share an entry, which records each of their
+paths). Entries can be dropped explicitly with `invalidate` or `clear_cache`, and the cache
+directory is kept under a size bound by evicting the least recently used
+entries.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from ftse import RAW_DTYPES, format_change_values, tidy_data
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'ftse')
+MAX_CACHE_BYTES = 1024 ** 3
+
+# Bump when the stored layout (or the processing it caches) changes, so that old entries are not reused.
+CACHE_VERSION = 2
+
+META_FILE = 'meta.json'
+INDEX_FILE = 'index.npy'
+
+
+def fingerprint(path, content_hash=False):
+    """Return a fingerprint of a source file, used as its cache key.
+
+    :param path: path of the source file
+    :type path: str
+    :param content_hash: hash the content of the file instead of using its path, size and modification time
+    :type content_hash: bool
+    :return: hexadecimal fingerprint
+    :rtype: str
+    """
+
+    digest = hashlib.sha256(f'v{CACHE_VERSION}'.encode())
+
+    if content_hash:
+        with open(path, 'rb') as source:
+            for block in iter(lambda: source.read(1024 * 1024), b''):
+                digest.update(block)
+    else:
+        stat = os.stat(path)
+        digest.update(f'{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}'.encode())
+
+    return digest.hexdigest()
+
+
+def load_ftse(path, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, content_hash=False, mmap=True):
+    """Return the tidied and formatted FTSE frame for a raw snapshot CSV, using the cache when the source file
+    has not changed.
+
+    :param path: path of the raw CSV file
+    :type path: str
+    :param cache_dir: cache directory
+    :type cache_dir: str
+    :param max_bytes: size bound of the cache directory, enforced after storing a new entry
+    :type max_bytes: int
+    :param content_hash: fingerprint the source by content instead of path, size and modification time
+    :type content_hash: bool
+    :param mmap: memory-map the cached columns (copy-on-write, so the frame can be modified without changing the
+        cache) instead of reading them
+    :type mmap: bool
+    :return: DataFrame as returned by `format_change_values`
+    :rtype: pd.DataFrame
+    """
+
+    entry = os.path.join(cache_dir, fingerprint(path, content_hash))
+
+    if os.path.exists(os.path.join(entry, META_FILE)):
+        return _read_entry(entry, mmap, os.path.abspath(path))
+
+    df = format_change_values(tidy_data(pd.read_csv(path, dtype=RAW_DTYPES)))
+    _write_entry(entry, df, os.path.abspath(path))
+    evict(cache_dir, max_bytes)
+
+    return df
+
+
+def invalidate(path, cache_dir=CACHE_DIR):
+    """Remove every cache entry built from a given source file, whatever its fingerprint.
+
+    :param path: path of the source file
+    :type path: str
+    :param cache_dir: cache directory
+    :type cache_dir: str
+    :return: number of entries removed
+    :rtype: int
+    """
+
+    source = os.path.abspath(path)
+    removed = 0
+
+    for entry in _entries(cache_dir):
+        with open(os.path.join(entry, META_FILE)) as meta:
+            if source in json.load(meta)['sources']:
+                shutil.rmtree(entry, ignore_errors=True)
+                removed += 1
+
+    return removed
+
+
+def clear_cache(cache_dir=CACHE_DIR):
+    """Remove every entry of the cache directory.
+
+    :param cache_dir: cache directory
+    :type cache_dir: str
+    :return: number of entries removed
+    :rtype: int
+    """
+
+    entries = _entries(cache_dir)
+    for entry in entries:
+        shutil.rmtree(entry, ignore_errors=True)
+
+    return len(entries)
+
+
+def evict(cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    """Remove the least recently used entries until the cache directory holds at most `max_bytes`.
+
+    :param cache_dir: cache directory
+    :type cache_dir: str
+    :param max_bytes: size bound of the cache directory
+    :type max_bytes: int
+    :return: number of entries removed
+    :rtype: int
+    """
+
+    entries = sorted(_entries(cache_dir), key=lambda entry: os.path.getmtime(os.path.join(entry, META_FILE)))
+    sizes = [sum(os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry)) for entry in entries]
+    total = sum(sizes)
+    removed = 0
+
+    for entry, size in zip(entries, sizes):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
+        removed += 1
+
+    return removed
+
+
+def _entries(cache_dir):
+    if not os.path.isdir(cache_dir):
+        return []
+
+    return [os.path.join(cache_dir, name) for name in os.listdir(cache_dir)
+            if os.path.exists(os.path.join(cache_dir, name, META_FILE))]
+
+
+def _write_entry(entry, df, source):
+    os.makedirs(os.path.dirname(entry), exist_ok=True)
+    staging = tempfile.mkdtemp(dir=os.path.dirname(entry), prefix='.tmp-')
+    columns = []
+
+    for position, name in enumerate(df.columns):
+        column = {'name': name, 'file': f'{position}.npy', 'categories': None, 'dtype': str(df[name].dtype)}
+        values = df[name]
+
+        if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            np.save(os.path.join(staging, column['file']), values.to_numpy())
+        else:
+            # Missing values get the code -1.
+            codes, categories = pd.factorize(values)
+            column['categories'] = f'{position}.categories.npy'
+            np.save(os.path.join(staging, column['file']), pd.to_numeric(codes, downcast='integer'))
+            np.save(os.path.join(staging, column['categories']), np.char.encode(categories.to_numpy(dtype=str), 'utf-8'))
+
+        columns.append(column)
+
+    np.save(os.path.join(staging, INDEX_FILE), df.index.to_numpy())
+
+    with open(os.path.join(staging, META_FILE), 'w') as meta:
+        json.dump({'sources': [source], 'rows': len(df), 'columns': columns}, meta)
+
+    try:
+        os.rename(staging, entry)
+    except OSError:
+        # Another process stored the same entry first.
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _read_entry(entry, mmap, source):
+    meta_path = os.path.join(entry, META_FILE)
+    with open(meta_path) as meta:
+        meta = json.load(meta)
+
+    if source not in meta['sources']:
+        # Another file with the same content (see `fingerprint`): record it, so that `invalidate` finds the entry.
+        meta['sources'].append(source)
+        staging = f'{meta_path}.{os.getpid()}.tmp'
+        with open(staging, 'w') as meta_file:
+            json.dump(meta, meta_file)
+        os.replace(staging, meta_path)
+
+    # Copy-on-write, so that the frame can be modified like a freshly parsed one without touching the cache.
+    mmap_mode = 'c' if mmap else None
+    index = pd.Index(np.load(os.path.join(entry, INDEX_FILE)))
+    data = {}
+    for column in meta['columns']:
+        # A plain ndarray view of the mapping, so the columns are the same as those of a freshly parsed frame.
+        values = np.load(os.path.join(entry, column['file']), mmap_mode=mmap_mode).view(np.ndarray)
+        if column['categories']:
+            categories = np.char.decode(np.load(os.path.join(entry, column['categories'])), 'utf-8')
+            values = pd.Series(pd.Categorical.from_codes(values, categories), index=index).astype(column['dtype'])
+        data[column['name']] = values
+
+    # Touch the entry so that eviction sees it as recently used.
+    os.utime(meta_path)
+
+    return pd.DataFrame(data, index=index, copy=False)
@@ -0,0 +1,93 @@
+"""
+Synthetic FTSE-shaped data.
+
+`make_ftse_frame` builds raw frames with the same layout and quirks as the
+broker snapshot file used by `ftse.py`, at any number of rows:
+
+- `Change` is text, with negative values given as a percentage (`-1.23%`)
+  and positive values as a fraction (`0.0123`)
+- `Mid-price (p)` is text with thousands separators (`1,234.50`)
+- `Strong Buy` only holds `n/a`
+- Royal Dutch Shell is listed twice, as `RDSA` and `RDSB`
+"""
+
+import numpy as np
+import pandas as pd
+
+SECTORS = ['Aerospace & Defence', 'Banks', 'Beverages', 'Construction & Materials', 'Food & Drug Retailers',
+           'General Retailers', 'Household Goods & Home Construction', 'Life Insurance', 'Media', 'Mining',
+           'Oil & Gas Producers', 'Pharmaceuticals & Biotechnology', 'Real Estate Investment Trusts',
+           'Support Services', 'Tobacco', 'Travel & Leisure']
+
+VIEWS = ['Buy', 'Hold', 'Sell']
+
+# Strings which `pd.read_csv` reads as NaN by default, so they must not be generated as tickers.
+NA_TOKENS = {'', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN', '<NA>', 'N/A',
+             'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'}
+
+COLUMNS = ['Ticker', 'Company', 'Mid-price (p)', 'Change', 'Our view', 'Brokers', 'Strong Buy', 'Buy', 'Hold',
+           'Sell', 'Sector']
+
+
+def _tickers(count):
+    """Return `count` distinct tickers (A, B, ..., Z, AA, AB, ...), leaving out the Royal Dutch Shell ones and
+    those `pd.read_csv` would read as NaN (see `NA_TOKENS`)."""
+
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    tickers = []
+    i = 0
+    while len(tickers) < count:
+        ticker = ''
+        n = i
+        while True:
+            n, remainder = divmod(n, 26)
+            ticker = letters[remainder] + ticker
+            if not n:
+                break
+            n -= 1
+        if ticker not in ('RDSA', 'RDSB') and ticker not in NA_TOKENS:
+            tickers.append(ticker)
+        i += 1
+
+    return tickers
+
+
+def make_ftse_frame(rows=101, seed=0):
+    """Return a raw FTSE-shaped DataFrame, ready for `tidy_data`.
+
+    The last two rows are always Royal Dutch Shell, listed as `RDSA` and `RDSB` with the same figures.
+
+    :param rows: number of rows, including the duplicate Royal Dutch Shell entry (at least 2)
+    :type rows: int
+    :param seed: random seed
+    :type seed: int
+    :return: raw DataFrame
+    :rtype: pd.DataFrame
+    """
+
+    rng = np.random.default_rng(seed)
+    companies = rows - 1
+
+    change = np.round(rng.normal(0, 0.015, companies), 4)
+    brokers = rng.integers(0, 30, companies)
+    buy = rng.binomial(brokers, 0.5)
+    sell = rng.binomial(brokers - buy, 0.3)
+    prices = np.round(rng.lognormal(7, 1, companies), 2)
+
+    df = pd.DataFrame({
+        'Ticker': _tickers(companies - 1) + ['RDSA'],
+        'Company': [f'Company {i}' for i in range(companies - 1)] + ['Royal Dutch Shell'],
+        'Mid-price (p)': [f'{price:,.2f}' for price in prices],
+        'Change': np.where(change < 0, [f'{value * 100:.2f}%' for value in change], change.astype(str)),
+        'Our view': rng.choice(VIEWS, companies, p=[0.4, 0.4, 0.2]),
+        'Brokers': brokers,
+        'Strong Buy': 'n/a',
+        'Buy': buy,
+        'Hold': brokers - buy - sell,
+        'Sell': sell,
+        'Sector': rng.choice(SECTORS, companies),
+    }, columns=COLUMNS)
+
+    shell = df.iloc[[-1]].assign(Ticker='RDSB')
+
+    return pd.concat([df, shell], ignore_index=True)
@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+from backtest import analyse_day, backtest, merge_partials
+from ftse import RAW_DTYPES, format_change_values, sector, tidy_data
+from synthetic import make_ftse_frame
+
+
+@pytest.fixture
+def days(tmp_path):
+    paths = {}
+    for day in range(4):
+        path = tmp_path / f'day{day}.csv'
+        make_ftse_frame(60 + 10 * day, seed=day).to_csv(path, index=False)
+        paths[f'2024-01-0{day + 1}'] = str(path)
+    return paths
+
+
+def _sector_frames(days):
+    return {day: sector(format_change_values(tidy_data(pd.read_csv(path, dtype=RAW_DTYPES))))
+            for day, path in days.items()}
+
+
+def test_merge_partials():
+    first = pd.DataFrame({'sum': [1.0, 2.0], 'count': [1, 2]}, index=['a', 'b'])
+    second = pd.DataFrame({'sum': [3.0], 'count': [4]}, index=['b'])
+
+    merged = merge_partials([first, second])
+
+    assert merged.loc['a'].tolist() == [1.0, 1.0]
+    assert merged.loc['b'].tolist() == [5.0, 6.0]
+    assert merge_partials([]).empty
+
+
+def test_backtest_equals_sequential_analysis(days):
+    wl = [('Company 1', 5000.0), ('Company 7', 1.0), ('Not Listed plc', 100.0)]
+
+    results = backtest(days, wl, max_workers=2)
+
+    assert list(results['days']) == list(days)
+    for day, path in days.items():
+        expected = analyse_day(path, wl)
+        assert results['days'][day]['investigate'] == expected['investigate']
+        pd.testing.assert_frame_equal(results['days'][day]['sector_change'], expected['sector_change'])
+
+    frames = _sector_frames(days)
+    everything = pd.concat(frames.values())
+    pd.testing.assert_series_equal(results['sector_mean'], everything.groupby('Sector')['Change (%)'].mean(),
+                                   check_names=False)
+    pd.testing.assert_series_equal(results['beat_frequency'],
+                                   everything.groupby('Company')['Beat Sector'].mean(), check_names=False)
+    for day, df in frames.items():
+        pd.testing.assert_series_equal(results['sector_change'].loc[day].dropna(),
+                                       df.groupby('Sector')['Change (%)'].mean(), check_names=False)
+
+
+def test_backtest_with_cache(days, tmp_path):
+    paths = list(days.values())
+    cache_dir = str(tmp_path / 'cache')
+
+    uncached = backtest(paths, max_workers=2)
+    cached = backtest(paths, max_workers=2, cache_dir=cache_dir)
+
+    assert list(cached['days']) == paths
+    pd.testing.assert_series_equal(cached['sector_mean'], uncached['sector_mean'])
+    pd.testing.assert_series_equal(cached['beat_frequency'], uncached['beat_frequency'])
+    pd.testing.assert_frame_equal(backtest(paths, max_workers=1, cache_dir=cache_dir)['sector_change'],
+                                  uncached['sector_change'])
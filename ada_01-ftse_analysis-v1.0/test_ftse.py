@@ -0,0 +1,284 @@
+import math
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ftse import (FLOAT32_COLUMNS, RAW_DTYPES, SectorTracker, bytes_per_row, compact, format_change_values, investigate,
+                  portfolio_overview, portfolio_overview_many, read_ftse_chunks, screen_watchlists, sector, tidy_data,
+                  write_ftse_chunks)
+from synthetic import make_ftse_frame
+
+
+@pytest.fixture
+def raw():
+    return make_ftse_frame(300, seed=2)
+
+
+@pytest.fixture
+def df(raw):
+    return format_change_values(tidy_data(raw))
+
+
+def test_tidy_data(raw):
+    tidy = tidy_data(raw)
+
+    assert 'Strong Buy' not in tidy
+    assert 'RDSA' not in tidy['Ticker'].values
+    assert (tidy['Ticker'] == 'RDSB').sum() == 1
+    assert len(tidy) == len(raw) - 1
+    assert 'Strong Buy' in raw
+
+
+def test_format_change_values():
+    df = pd.DataFrame({'Mid-price (p)': ['1,234.50', '98.10', '12,001.00'],
+                       'Change': ['-1.23%', '0.0123', '0.004567']})
+
+    formatted = format_change_values(df)
+
+    assert list(formatted.columns) == ['Mid-price (p)', 'Change (%)']
+    assert formatted['Mid-price (p)'].tolist() == [1234.5, 98.1, 12001.0]
+    assert formatted['Change (%)'].tolist() == [-1.23, 1.23, 0.46]
+
+
+def test_format_change_values_matches_row_by_row(raw):
+    tidy = tidy_data(raw)
+    expected = [float(change[:-1]) if '-' in change else round(float(change) * 100, 2) for change in tidy['Change']]
+
+    assert format_change_values(tidy)['Change (%)'].tolist() == expected
+
+
+def test_sector_matches_row_by_row(df):
+    df.loc[df.index[:3], 'Brokers'] = 0
+    df.loc[df.index[:3], 'Buy'] = 0
+
+    result = sector(df.copy())
+
+    averages = df.groupby('Sector')['Change (%)'].transform(pd.Series.mean)
+    assert list(result.columns) == ['Company', 'Mid-price (p)', 'Sector', 'Change (%)', 'Avg. Sector Change (%)',
+                                    'Our view', 'Beat Sector', 'Buy Ratio']
+    assert result['Avg. Sector Change (%)'].tolist() == averages.round(3).tolist()
+    assert result['Beat Sector'].tolist() == [change > average for change, average in zip(df['Change (%)'], averages)]
+    assert result['Buy Ratio'].tolist() == [buy / brokers if brokers > 0 else 0
+                                            for buy, brokers in zip(df['Buy'], df['Brokers'])]
+
+
+def _overview_loop(df, portfolio):
+    # The original implementation of portfolio_overview.
+    profits = set()
+    total_cost = 0.0
+    value = 0.0
+    for ticker, shares, paid in portfolio:
+        total_cost += shares * paid
+        price = df[df['Ticker'] == ticker]['Mid-price (p)'].values[0]
+        value += shares * price
+        if price > paid:
+            profits.add(ticker)
+
+    return {'portfolio_cost': total_cost/100,
+            'portfolio_value': value/100,
+            'change_in_value': round(((value - total_cost)/total_cost) * 100, 1),
+            'profit': profits}
+
+
+def _portfolios(df, count, seed=0):
+    rng = random.Random(seed)
+    tickers = df['Ticker'].tolist()
+    return [[(rng.choice(tickers), rng.randint(1, 5000), round(rng.uniform(1, 5000), 2))
+             for _ in range(rng.randint(1, 12))] for _ in range(count)]
+
+
+def test_portfolio_overview_matches_loop(df):
+    for portfolio in _portfolios(df, 50):
+        assert portfolio_overview(df, portfolio) == _overview_loop(df, portfolio)
+
+
+def test_portfolio_overview_many(df):
+    portfolios = _portfolios(df, 50, seed=1)
+    expected = [_overview_loop(df, portfolio) for portfolio in portfolios]
+
+    assert portfolio_overview_many(df, portfolios) == expected
+    assert portfolio_overview_many(df, dict(zip('abcdefghij', portfolios))) == dict(zip('abcdefghij', expected))
+    assert portfolio_overview_many(df, []) == []
+
+
+def test_portfolio_overview_zero_cost(df):
+    ticker = df['Ticker'].iloc[0]
+
+    empty, free = portfolio_overview_many(df, [[], [(ticker, 10, 0.0)]])
+    assert empty['portfolio_cost'] == 0.0 and math.isnan(empty['change_in_value']) and empty['profit'] == set()
+    assert free['profit'] == {ticker} and math.isnan(free['change_in_value'])
+
+    with pytest.raises(ZeroDivisionError):
+        portfolio_overview(df, [])
+
+
+def test_portfolio_overview_unknown_ticker(df):
+    with pytest.raises(KeyError):
+        portfolio_overview_many(df, [[(df['Ticker'].iloc[0], 1, 1.0)], [('NOPE', 1, 1.0)]])
+
+
+def _investigate_scan(df, wl):
+    # The original implementation of investigate.
+    wl_filter = [item[0] for item in wl if not df[(
+        df['Company'] == item[0]) & (df['Mid-price (p)'] <= item[1])].empty]
+    buy_filter = list(df[(~df['Beat Sector']) & (df['Our view'] == 'Buy') & (
+        df['Buy Ratio'] >= 0.5)]['Company'].values)
+    return pd.Series(wl_filter + buy_filter).drop_duplicates().tolist()
+
+
+def _watchlists(df, count, seed=0):
+    rng = random.Random(seed)
+    companies = df['Company'].tolist() + ['Not Listed plc']
+    return {f'wl{i}': [(rng.choice(companies), round(rng.uniform(1, 5000), 2)) for _ in range(rng.randint(0, 15))]
+            for i in range(count)}
+
+
+def test_investigate_matches_scan(df):
+    df = sector(df)
+
+    for wl in _watchlists(df, 30).values():
+        assert investigate(df, wl) == _investigate_scan(df, wl)
+
+
+def test_screen_watchlists(df):
+    df = sector(df)
+    watchlists = _watchlists(df, 30, seed=1)
+    company = df['Company'].iloc[0]
+    price = df['Mid-price (p)'].iloc[0]
+    # The same company twice, both entries hitting.
+    watchlists['twice'] = [(company, price), (company, price + 1)]
+
+    screens = screen_watchlists(df, watchlists)
+
+    assert list(screens) == list(watchlists)
+    for name, wl in watchlists.items():
+        assert screens[name] == _investigate_scan(df, wl)
+    assert screens['twice'][0] == company
+    assert screen_watchlists(df, {}) == {}
+
+
+def test_screen_watchlists_rule_parameters(df):
+    df = sector(df)
+    screens = screen_watchlists(df, {'none': []}, beat_sector=True, view='Sell', min_buy_ratio=0.2)
+
+    expected = df[df['Beat Sector'] & (df['Our view'] == 'Sell') & (df['Buy Ratio'] >= 0.2)]['Company']
+    assert screens == {'none': expected.tolist()}
+
+
+@pytest.mark.parametrize('chunksize', [1, 7, 1000])
+def test_read_ftse_chunks_equals_whole_file(raw, tmp_path, chunksize):
+    path = tmp_path / 'ftse.csv'
+    raw.to_csv(path, index=False)
+    expected = format_change_values(tidy_data(pd.read_csv(path, dtype=RAW_DTYPES)))
+
+    chunks = list(read_ftse_chunks(path, chunksize))
+
+    assert max(map(len, chunks)) <= chunksize
+    pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+
+
+def test_write_ftse_chunks(raw, tmp_path):
+    path = tmp_path / 'ftse.csv'
+    dest = tmp_path / 'normalised.csv'
+    raw.to_csv(path, index=False)
+    expected = format_change_values(tidy_data(pd.read_csv(path, dtype=RAW_DTYPES)))
+
+    assert write_ftse_chunks(path, dest, chunksize=50) == len(expected)
+    pd.testing.assert_frame_equal(pd.read_csv(dest), expected.reset_index(drop=True))
+
+
+def test_sector_tracker_follows_sector(df):
+    rng = random.Random(3)
+    # to_frame numbers the rows from 0.
+    df = df.reset_index(drop=True)
+    current = sector(df.copy())
+    companies = current['Company'].tolist()
+    wl = [(company, round(rng.uniform(1, 5000), 2)) for company in rng.sample(companies, 20)]
+    tracker = SectorTracker(current, wl)
+
+    pd.testing.assert_frame_equal(tracker.to_frame(), current)
+    assert set(tracker.flagged()) == set(investigate(current, wl))
+
+    for tick in range(100):
+        company = rng.choice(companies)
+        change = float('nan') if tick % 25 == 0 else round(rng.uniform(-5, 5), 2)
+        price = round(rng.uniform(1, 5000), 2) if tick % 3 == 0 else None
+        flagged = set(tracker.flagged())
+
+        flips, alerts = tracker.update(company, change=change, price=price)
+
+        row = companies.index(company)
+        df.loc[row, 'Change (%)'] = change
+        if price is not None:
+            df.loc[row, 'Mid-price (p)'] = price
+        previous = current['Beat Sector']
+        current = sector(df.copy())
+
+        pd.testing.assert_frame_equal(tracker.to_frame(), current)
+        assert flips == {name: beat for name, beat, before in zip(companies, current['Beat Sector'], previous)
+                         if beat != before}
+        assert set(tracker.flagged()) == set(investigate(current, wl))
+        assert alerts == {member: member not in flagged for member in flagged ^ set(tracker.flagged())}
+
+
+def test_sector_tracker_average(df):
+    current = sector(df)
+    tracker = SectorTracker(current)
+    sector_name = current['Sector'].iloc[0]
+
+    assert tracker.average(sector_name) == current.loc[current['Sector'] == sector_name, 'Change (%)'].mean()
+    assert math.isnan(tracker.average('No Such Sector'))
+    with pytest.raises(KeyError):
+        tracker.update('Not Listed plc', change=1.0)
+
+
+def _widen(df):
+    return df.astype({name: str for name in df.columns if isinstance(df[name].dtype, pd.CategoricalDtype)})
+
+
+def test_low_memory_pipeline_keeps_the_values(raw):
+    expected = sector(format_change_values(tidy_data(raw.copy())))
+
+    lean = sector(format_change_values(tidy_data(raw.copy(), low_memory=True), low_memory=True), low_memory=True)
+
+    assert list(lean.columns) == list(expected.columns)
+    assert lean['Company'].dtype == 'category' and lean['Sector'].dtype == 'category'
+    assert lean['Avg. Sector Change (%)'].dtype == np.float32
+    assert lean['Mid-price (p)'].dtype == lean['Change (%)'].dtype == lean['Buy Ratio'].dtype == np.float64
+    pd.testing.assert_frame_equal(_widen(lean), expected, check_dtype=False, check_exact=False, atol=5e-3)
+    assert (lean.drop(columns=FLOAT32_COLUMNS).pipe(_widen) == expected.drop(columns=FLOAT32_COLUMNS)).all().all()
+    assert bytes_per_row(lean) < bytes_per_row(expected)
+
+
+def test_low_memory_results_give_the_same_answers(raw):
+    df = format_change_values(tidy_data(raw.copy()))
+    lean = format_change_values(tidy_data(raw.copy(), low_memory=True), low_memory=True)
+    portfolio = [(ticker, 100 + i, 1000.0) for i, ticker in enumerate(df['Ticker'].iloc[:20])]
+    wl = [(company, 2000.0) for company in df['Company'].iloc[::7]]
+
+    assert portfolio_overview(lean, portfolio) == portfolio_overview(df, portfolio)
+    assert investigate(sector(lean, low_memory=True), wl) == investigate(sector(df), wl)
+
+
+def test_tidy_data_low_memory_works_in_place(raw):
+    tidied = tidy_data(raw, low_memory=True)
+
+    assert tidied is raw
+    assert 'Strong Buy' not in raw and 'RDSA' not in raw['Ticker'].values
+
+
+def test_compact():
+    df = pd.DataFrame({'Ticker': ['A', 'B', 'A'], 'Brokers': [1, 2, 300], 'Mid-price (p)': [1.1, 2.2, 3.3],
+                       'Avg. Sector Change (%)': [0.125, -1.5, np.nan]})
+
+    assert compact(df) is df
+    assert df['Ticker'].dtype == 'category'
+    assert df['Brokers'].dtype == np.int16
+    assert df['Mid-price (p)'].dtype == np.float64
+    assert df['Avg. Sector Change (%)'].dtype == np.float32
+
+    # Values which float32 cannot keep to the requested number of decimal places stay float64.
+    precise = compact(pd.DataFrame({'Avg. Sector Change (%)': [1234567.891]}), decimals=3)
+    assert precise['Avg. Sector Change (%)'].dtype == np.float64
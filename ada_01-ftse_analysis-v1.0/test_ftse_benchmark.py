@@ -0,0 +1,28 @@
+from benchmark import MIN_SECONDS, regressions, run_rowwise
+
+
+def test_rowwise_and_columnar_agree():
+    # run_rowwise raises if the two implementations produce different frames.
+    timings = run_rowwise(500)
+
+    assert set(timings) == {(name, implementation) for name in ('format_change_values', 'sector')
+                            for implementation in ('rowwise', 'columnar')}
+
+
+def test_regressions():
+    baseline = {'100': {'sector': {'seconds': 0.1, 'peak_bytes': 1000}}}
+
+    assert regressions({'100': {'sector': {'seconds': 0.12, 'peak_bytes': 1100}}}, baseline, 1.25) == []
+    failures = regressions({'100': {'sector': {'seconds': 0.2, 'peak_bytes': 2000}}}, baseline, 1.25)
+    assert len(failures) == 2 and all(failure.startswith('sector at 100 rows') for failure in failures)
+
+
+def test_regressions_ignore_new_cases_and_noise():
+    baseline = {'100': {'sector': {'seconds': MIN_SECONDS / 10, 'peak_bytes': 1000}}}
+    results = {'100': {'sector': {'seconds': MIN_SECONDS, 'peak_bytes': 1000},
+                       'investigate': {'seconds': 1.0, 'peak_bytes': 10 ** 9}},
+               '1000': {'sector': {'seconds': 1.0, 'peak_bytes': 10 ** 9}}}
+
+    assert regressions(results, baseline, 1.25) == []
+    results['100']['sector']['seconds'] = MIN_SECONDS * 2
+    assert len(regressions(results, baseline, 1.25)) == 1
@@ -0,0 +1,126 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ftse_cache import META_FILE, clear_cache, evict, fingerprint, invalidate, load_ftse
+from synthetic import make_ftse_frame
+
+
+@pytest.fixture
+def source(tmp_path):
+    raw = make_ftse_frame(200, seed=1)
+    # Non-ASCII and missing text, which the categories file has to keep.
+    raw.loc[0, 'Company'] = 'Société Générale'
+    raw.loc[1, 'Company'] = np.nan
+    path = tmp_path / 'ftse.csv'
+    raw.to_csv(path, index=False)
+    return str(path)
+
+
+def _entries(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if not name.startswith('.'))
+
+
+@pytest.mark.parametrize('mmap', [True, False])
+def test_hit_equals_miss(source, tmp_path, mmap):
+    cache_dir = str(tmp_path / 'cache')
+
+    miss = load_ftse(source, cache_dir, mmap=mmap)
+    hit = load_ftse(source, cache_dir, mmap=mmap)
+
+    assert len(_entries(cache_dir)) == 1
+    pd.testing.assert_frame_equal(hit, miss)
+    assert miss['Company'].iloc[0] == 'Société Générale'
+    assert pd.isna(hit['Company'].iloc[1])
+
+
+def test_hit_can_be_modified_without_changing_the_cache(source, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    miss = load_ftse(source, cache_dir)
+
+    hit = load_ftse(source, cache_dir)
+    hit.iloc[0, hit.columns.get_loc('Brokers')] += 1
+    hit['Mid-price (p)'] *= 2
+    hit.loc[hit.index[0], 'Company'] = 'Changed plc'
+
+    pd.testing.assert_frame_equal(load_ftse(source, cache_dir), miss)
+
+
+def test_changed_source_is_a_miss(source, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    load_ftse(source, cache_dir)
+
+    raw = pd.read_csv(source)
+    raw.loc[0, 'Company'] = 'Renamed plc'
+    raw.to_csv(source, index=False)
+    os.utime(source, ns=(0, 0))
+
+    assert load_ftse(source, cache_dir)['Company'].iloc[0] == 'Renamed plc'
+    assert len(_entries(cache_dir)) == 2
+
+
+def test_content_hash_shares_entries(source, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    copy = str(tmp_path / 'copy.csv')
+    shutil.copy(source, copy)
+
+    assert fingerprint(source, content_hash=True) == fingerprint(copy, content_hash=True)
+    assert fingerprint(source) != fingerprint(copy)
+
+    miss = load_ftse(source, cache_dir, content_hash=True)
+    pd.testing.assert_frame_equal(load_ftse(copy, cache_dir, content_hash=True), miss)
+
+    entries = _entries(cache_dir)
+    assert len(entries) == 1
+    with open(os.path.join(cache_dir, entries[0], META_FILE)) as meta:
+        assert json.load(meta)['sources'] == [os.path.abspath(source), os.path.abspath(copy)]
+
+    # Either path finds the shared entry.
+    assert invalidate(copy, cache_dir) == 1
+    assert _entries(cache_dir) == []
+
+
+def test_invalidate_and_clear(source, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    load_ftse(source, cache_dir)
+    load_ftse(source, cache_dir, content_hash=True)
+
+    assert invalidate(str(tmp_path / 'other.csv'), cache_dir) == 0
+    assert invalidate(source, cache_dir) == 2
+    assert invalidate(source, cache_dir) == 0
+
+    load_ftse(source, cache_dir)
+    assert clear_cache(cache_dir) == 1
+    assert clear_cache(cache_dir) == 0
+    assert clear_cache(str(tmp_path / 'missing')) == 0
+
+
+def test_evict_least_recently_used(source, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    load_ftse(source, cache_dir)
+    first = _entries(cache_dir)
+    load_ftse(source, cache_dir, content_hash=True)
+    second = [entry for entry in _entries(cache_dir) if entry not in first]
+
+    # A hit makes the first entry the most recently used one.
+    os.utime(os.path.join(cache_dir, second[0], META_FILE), ns=(0, 0))
+    load_ftse(source, cache_dir)
+    size = sum(os.path.getsize(os.path.join(cache_dir, first[0], name))
+               for name in os.listdir(os.path.join(cache_dir, first[0])))
+
+    assert evict(cache_dir, max_bytes=size) == 1
+    assert _entries(cache_dir) == first
+    assert evict(cache_dir, max_bytes=0) == 1
+    assert _entries(cache_dir) == []
+
+
+def test_new_entry_respects_the_bound(source, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    df = load_ftse(source, cache_dir, max_bytes=0)
+
+    assert _entries(cache_dir) == []
+    pd.testing.assert_frame_equal(load_ftse(source, cache_dir), df)
@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from ftse import RAW_DTYPES, format_change_values, tidy_data
+from synthetic import COLUMNS, NA_TOKENS, SECTORS, VIEWS, _tickers, make_ftse_frame
+
+
+def test_tickers_are_distinct_and_readable():
+    tickers = _tickers(20_000)
+
+    assert len(set(tickers)) == len(tickers)
+    assert tickers[:3] == ['A', 'B', 'C'] and tickers[26] == 'AA'
+    assert not {'RDSA', 'RDSB'} & set(tickers)
+    assert not NA_TOKENS & set(tickers)
+
+
+@pytest.mark.parametrize('rows', [2, 101, 5000])
+def test_make_ftse_frame_layout(rows):
+    raw = make_ftse_frame(rows)
+
+    assert list(raw.columns) == COLUMNS
+    assert len(raw) == rows
+    assert raw['Ticker'].tolist()[-2:] == ['RDSA', 'RDSB']
+    assert raw.iloc[-2].drop('Ticker').equals(raw.iloc[-1].drop('Ticker'))
+    assert (raw['Strong Buy'] == 'n/a').all()
+    assert (raw['Buy'] + raw['Hold'] + raw['Sell'] == raw['Brokers']).all()
+    assert set(raw['Sector']) <= set(SECTORS) and set(raw['Our view']) <= set(VIEWS)
+
+
+def test_make_ftse_frame_is_seeded():
+    pd.testing.assert_frame_equal(make_ftse_frame(200, seed=5), make_ftse_frame(200, seed=5))
+    assert not make_ftse_frame(200, seed=5).equals(make_ftse_frame(200, seed=6))
+
+
+def test_make_ftse_frame_survives_a_csv_round_trip(tmp_path):
+    path = tmp_path / 'ftse.csv'
+    make_ftse_frame(20_000).to_csv(path, index=False)
+
+    df = format_change_values(tidy_data(pd.read_csv(path, dtype=RAW_DTYPES)))
+
+    assert len(df) == 20_000 - 1
+    assert df['Ticker'].notna().all()
+    assert df['Change (%)'].notna().all() and df['Mid-price (p)'].notna().all()
+    negative = df['Change (%)'] < 0
+    assert negative.any() and (~negative).any()
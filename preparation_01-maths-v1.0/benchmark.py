@@ -0,0 +1,158 @@
+"""
+Benchmarks for the maths preparation modules.
+
+    python benchmark.py outliers [--points 10000000]
+
+Times remove_outliers with the 2-standard-deviation rule against the
+median/MAD rule, on a python list and on a NumPy array, and compares the
+selection-based median with a sort-based one.
+
+    python benchmark.py matrix_mul [--size 300]
+
+Times matrix_mul on square float matrices with each of its backends.
+
+    python benchmark.py parallel_matrix_mul [--size 400] [--workers 1 2 4]
+
+Times parallel_matrix_mul with increasing numbers of worker processes and
+reports the speedup over a single worker.
+"""
+
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+
+from linear_algebra import SEQUENTIAL_SUM, matrix_mul, parallel_matrix_mul
+from statistics import calculate_median, remove_outliers
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def _sorted_median(data):
+    values = sorted(data)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+
+def bench_outliers(points, seed=0):
+    """
+    Time the outlier removal methods on normally distributed data with 1%
+    of gross outliers.
+
+    :param points: number of points
+    :param seed: random seed
+    :return: timings in seconds, keyed by description
+    :rtype: dict
+    """
+
+    rng = random.Random(seed)
+    data = [rng.gauss(0, 1) for _ in range(points)]
+    for i in range(0, points, 100):
+        data[i] = rng.uniform(50, 100)
+    array = np.array(data)
+
+    timings = {}
+    _, timings['median, sorted list'] = _timed(_sorted_median, data)
+    _, timings['median, quickselect list'] = _timed(calculate_median, data)
+    _, timings['median, np.partition'] = _timed(calculate_median, array)
+
+    kept, timings['remove_outliers std, list'] = _timed(remove_outliers, data)
+    print(f'std rule kept {len(kept)} of {points} points')
+    kept, timings['remove_outliers mad, list'] = _timed(remove_outliers, data, method='mad')
+    print(f'mad rule kept {len(kept)} of {points} points')
+    _, timings['remove_outliers mad, array'] = _timed(remove_outliers, array, method='mad')
+
+    return timings
+
+
+def bench_matrix_mul(size, seed=0):
+    """
+    Time matrix_mul on two size x size float matrices with the
+    pure-Python kernel, the exact NumPy path (only used before Python
+    3.12) and BLAS.
+
+    :param size: number of rows and columns of the matrices
+    :param seed: random seed
+    :return: timings in seconds, keyed by description
+    :rtype: dict
+    """
+
+    rng = random.Random(seed)
+    A = [[rng.random() for _ in range(size)] for _ in range(size)]
+    B = [[rng.random() for _ in range(size)] for _ in range(size)]
+
+    timings = {}
+    expected, timings['pure Python (tiled)'] = _timed(matrix_mul, A, B, threshold=float('inf'))
+    if SEQUENTIAL_SUM:
+        actual, timings['NumPy (exact)'] = _timed(matrix_mul, A, B, threshold=0)
+        assert actual == expected
+    _, timings['NumPy (BLAS)'] = _timed(matrix_mul, A, B, threshold=0, exact=False)
+
+    return timings
+
+
+def bench_parallel_matrix_mul(size, workers, seed=0):
+    """
+    Time parallel_matrix_mul on two size x size float matrices for each
+    number of workers, and report the speedup over one worker.
+
+    :param size: number of rows and columns of the matrices
+    :param workers: numbers of worker processes to try
+    :param seed: random seed
+    :return: timings in seconds, keyed by description
+    :rtype: dict
+    """
+
+    rng = random.Random(seed)
+    A = [[rng.random() for _ in range(size)] for _ in range(size)]
+    B = [[rng.random() for _ in range(size)] for _ in range(size)]
+
+    timings = {}
+    expected, timings['matrix_mul (pure Python)'] = _timed(matrix_mul, A, B, threshold=float('inf'))
+
+    single = None
+    for count in workers:
+        actual, seconds = _timed(parallel_matrix_mul, A, B, workers=count)
+        assert actual == expected
+        single = single or seconds
+        timings[f'{count} worker(s), speedup {single / seconds:.2f}x'] = seconds
+
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    outliers = commands.add_parser('outliers', help='compare the outlier removal methods')
+    outliers.add_argument('--points', type=int, default=10_000_000)
+
+    matrix = commands.add_parser('matrix_mul', help='compare the matrix_mul backends')
+    matrix.add_argument('--size', type=int, default=300)
+
+    parallel = commands.add_parser('parallel_matrix_mul', help='measure the speedup of parallel_matrix_mul')
+    parallel.add_argument('--size', type=int, default=400)
+    parallel.add_argument('--workers', type=int, nargs='+',
+                          default=sorted({1, 2, 4, os.cpu_count() or 1}))
+
+    args = parser.parse_args()
+
+    if args.command == 'outliers':
+        timings = bench_outliers(args.points)
+    elif args.command == 'matrix_mul':
+        timings = bench_matrix_mul(args.size)
+    elif args.command == 'parallel_matrix_mul':
+        timings = bench_parallel_matrix_mul(args.size, args.workers)
+
+    for name, seconds in timings.items():
+        print(f'{name:<32} {seconds:8.3f}s')
+
+
+if __name__ == '__main__':
+    main()
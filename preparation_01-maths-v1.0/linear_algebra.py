@@ -3,10 +3,40 @@ This file contains a set of functions to practice your
 linear algebra skills.
 
 It needs to be completed using "vanilla" Python, without
-help from any library.
+help from any library -- except that matrix_mul hands large
+products over to NumPy when it is installed, and that the batched
+gradient_batch, pairwise_metrics and knn require it.
 """
 
+import os
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
 from math import sqrt
+from multiprocessing.shared_memory import SharedMemory
+from operator import add, mul, sub
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Number of multiply-adds (rows of A x columns of A x columns of B) from
+# which matrix_mul uses NumPy, when it is installed.
+NUMPY_THRESHOLD = 32 ** 3
+
+# Upper bound on the size (in bytes) of the temporary differences array
+# built by pairwise_metrics for each chunk of rows.
+PAIRWISE_CHUNK_BYTES = 64 * 1024 ** 2
+
+# Number of columns of B processed together by the pure-Python kernel of
+# matrix_mul, so that they stay in cache while every row of A goes past.
+TILE_SIZE = 64
+
+# Before Python 3.12, sum() adds floats one after the other, which NumPy can
+# reproduce exactly; since then it uses compensated (Neumaier) summation.
+SEQUENTIAL_SUM = sys.version_info < (3, 12)
 
 
 def gradient(w1=0, w2=0, x=(0, 0)):
@@ -17,7 +47,7 @@ def gradient(w1=0, w2=0, x=(0, 0)):
 
     :param w1: first coefficient
     :param w2: second coefficient
-    :param x: a point represented by a valid tuple (x1, x2)
+    :param x: a point represented by a valid tuple (x1, x2) or a Vector
     :return: the two coordinates of gradient of f
     at point x
     :rtype: float, float
@@ -33,6 +63,43 @@ def gradient(w1=0, w2=0, x=(0, 0)):
     return (2 * w1 * x_1, w2)
 
 
+def gradient_batch(w1, w2, points):
+    """
+    Batched version of gradient: evaluate the gradient of
+    f(x) = w1 * x1^2 + w2 * x2 at many points, for one or many pairs of
+    coefficients, in one vectorised call.
+
+    w1, w2 and the points (without their last axis) are broadcast
+    together, e.g. N points with scalar coefficients, or N points with N
+    pairs of coefficients, or a grid of coefficients against N points
+    using shapes (C, 1) and (N, 2).
+
+    The dimension of the points is checked once for the whole batch,
+    raising the same errors as gradient.
+
+    :param w1: first coefficient(s)
+    :param w2: second coefficient(s)
+    :param points: array-like of points, of shape (..., 2)
+    :return: the gradients, of shape (..., 2)
+    :rtype: np.ndarray
+    :raise ValueError:
+    """
+
+    if np is None:
+        raise ImportError("gradient_batch requires NumPy")
+
+    points = np.asarray(points, dtype=float)
+    if points.ndim and points.shape[-1] > 2:
+        raise ValueError("Too many items in vector")
+    if not points.ndim or points.shape[-1] < 2:
+        raise ValueError("Not enough items in vector (should be 2)")
+
+    d_1 = 2 * np.asarray(w1) * points[..., 0]
+    d_1, d_2 = np.broadcast_arrays(d_1, np.asarray(w2, dtype=float))
+
+    return np.stack([d_1, d_2], axis=-1)
+
+
 def metrics(u, v):
     """
     Given two vectors u and v, compute the following distances/norm between
@@ -43,6 +110,10 @@ def metrics(u, v):
     If the two vectors have different dimensions,
     you should raise a ValueError
 
+    If either vector is a SparseVector, only the nonzero entries of the
+    two vectors are visited. If either vector is a Vector, the
+    differences are computed once, into a compact array.
+
     :param u: first vector (list)
     :param v: second vector (list)
     :return: l1 distance, l2 distance
@@ -50,9 +121,15 @@ def metrics(u, v):
     :raise ValueError:
     """
 
+    if isinstance(u, SparseVector) or isinstance(v, SparseVector):
+        return _sparse_metrics(*_sparse_pair(u, v))
+
     if len(u) != len(v):
         raise ValueError("Vector dimensions do not match")
 
+    if isinstance(u, Vector) or isinstance(v, Vector):
+        return _vector_metrics(u, v)
+
     avs1 = [abs(a-b) for a, b in zip(u, v)]
     l_1 = sum(avs1)
 
@@ -62,6 +139,95 @@ def metrics(u, v):
     return (l_1, l_2)
 
 
+def pairwise_metrics(U, V, chunk_bytes=PAIRWISE_CHUNK_BYTES):
+    """
+    Batched version of metrics: given two sets of vectors U (N vectors)
+    and V (M vectors), compute the l1 and l2 distances between every
+    vector of U and every vector of V.
+
+    The distances are computed with NumPy broadcasting, a chunk of rows
+    of U at a time, so that the temporary differences array stays under
+    chunk_bytes.
+
+    If the vectors of U and V have different dimensions,
+    a ValueError is raised
+
+    :param U: first set of vectors (list of lists or 2-D array)
+    :param V: second set of vectors (list of lists or 2-D array)
+    :param chunk_bytes: memory bound of each chunk
+    :return: l1 distances, l2 distances (N x M arrays)
+    :rtype: np.ndarray, np.ndarray
+    :raise ValueError:
+    """
+
+    return _pairwise_distances(U, V, ('l1', 'l2'), chunk_bytes)
+
+
+def knn(query, corpus, k, metric='l2', chunk_bytes=PAIRWISE_CHUNK_BYTES):
+    """
+    Find the k vectors of the corpus closest to the query vector(s).
+
+    The distances are computed as in pairwise_metrics, then the k
+    smallest of each row are selected with argpartition (without sorting
+    the whole row) and only those are sorted.
+
+    If the query and corpus vectors have different dimensions,
+    a ValueError is raised
+
+    :param query: a vector, or a list of vectors (list or array)
+    :param corpus: list of vectors (list of lists or 2-D array)
+    :param k: number of neighbours (at most the size of the corpus)
+    :param metric: 'l1' or 'l2'
+    :param chunk_bytes: memory bound of each chunk of distances
+    :return: indices in the corpus of the k nearest neighbours and their
+    distances, closest first (one row per query vector if query is a
+    list of vectors)
+    :rtype: np.ndarray, np.ndarray
+    :raise ValueError:
+    """
+
+    if metric not in ('l1', 'l2'):
+        raise ValueError("Unknown metric, expected 'l1' or 'l2'")
+
+    single = np.ndim(query) == 1
+    distances, = _pairwise_distances(np.atleast_2d(query), corpus, (metric,), chunk_bytes)
+
+    k = min(k, distances.shape[1])
+    if k < distances.shape[1]:
+        nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    else:
+        nearest = np.broadcast_to(np.arange(k), distances.shape).copy()
+
+    order = np.argsort(np.take_along_axis(distances, nearest, axis=1), axis=1, kind='stable')
+    nearest = np.take_along_axis(nearest, order, axis=1)
+    distances = np.take_along_axis(distances, nearest, axis=1)
+
+    return (nearest[0], distances[0]) if single else (nearest, distances)
+
+
+def _pairwise_distances(U, V, metrics_names, chunk_bytes):
+    if np is None:
+        raise ImportError("pairwise distances require NumPy")
+
+    U = np.asarray(U, dtype=float)
+    V = np.asarray(V, dtype=float)
+    if U.ndim != 2 or V.ndim != 2 or U.shape[1] != V.shape[1]:
+        raise ValueError("Vector dimensions do not match")
+
+    results = {name: np.empty((U.shape[0], V.shape[0])) for name in metrics_names}
+    rows = max(1, chunk_bytes // max(1, 8 * V.shape[0] * V.shape[1]))
+
+    for start in range(0, U.shape[0], rows):
+        diff = np.abs(U[start:start + rows, None, :] - V[None, :, :])
+        if 'l1' in results:
+            results['l1'][start:start + rows] = diff.sum(axis=2)
+        if 'l2' in results:
+            np.multiply(diff, diff, out=diff)
+            results['l2'][start:start + rows] = np.sqrt(diff.sum(axis=2))
+
+    return tuple(results[name] for name in metrics_names)
+
+
 def list_mul(u, v):
     """
     Given two vectors, calculate and return the following quantities:
@@ -72,6 +238,16 @@ def list_mul(u, v):
     If the two vectors have different dimensions,
     you should raise a ValueError
 
+    If either vector is a SparseVector, only the nonzero entries of the
+    two vectors are visited, and the element-wise sum and product are
+    returned as SparseVectors. If either vector is a Vector, the
+    element-wise sum and product are built directly as Vectors, and the
+    dot product is summed from the product. (This replaces an earlier
+    fused single-pass kernel: totalling with += in the same loop only
+    gives the same dot product as sum() before Python 3.12, which sums
+    floats with compensation, so the kernel was dropped in favour of
+    separate C-level passes with the same results as for lists.)
+
     :param u: first vector (list)
     :param v: second vector (list)
     :return: the three quantities above
@@ -79,9 +255,15 @@ def list_mul(u, v):
     :raise ValueError:
     """
 
+    if isinstance(u, SparseVector) or isinstance(v, SparseVector):
+        return _sparse_list_mul(*_sparse_pair(u, v))
+
     if len(u) != len(v):
         raise ValueError("Vector dimensions do not match")
 
+    if isinstance(u, Vector) or isinstance(v, Vector):
+        return _vector_list_mul(u, v)
+
     vsum = [a+b for a, b in zip(u, v)]
     vprod = [a*b for a, b in zip(u, v)]
     dprod = sum((a*b for a, b in zip(u, v)))
@@ -89,7 +271,7 @@ def list_mul(u, v):
     return vsum, vprod, dprod
 
 
-def matrix_mul(A, B):
+def matrix_mul(A, B, threshold=None, exact=True):
     """
     Given two valid matrices A and B represented as a list of lists,
     implement a function to multiply them together (A * B). Your solution
@@ -104,12 +286,125 @@ def matrix_mul(A, B):
     If the two matrices have incompatible dimensions or are not valid meaning that
     not all rows in the matrices have the same length you should raise a ValueError.
 
+    Products of at least `threshold` multiply-adds (NUMPY_THRESHOLD by
+    default) of integers or floats are computed with NumPy when it is
+    installed. Integer products which could overflow 64 bits, other
+    types and smaller products use a pure-Python kernel which transposes
+    B once and works through it in tiles of TILE_SIZE columns.
+
+    Both give the same results as sum() over the products of each row
+    and column. For float products, NumPy can only reproduce it before
+    Python 3.12 (when sum() became compensated), so from 3.12 on they stay
+    in pure Python unless exact=False, in which case they go through BLAS,
+    which is much faster but may differ in the last bits.
+
+    If either matrix is a CSRMatrix, the other one is converted to a
+    CSRMatrix too and the product, computed from the nonzero entries
+    only, is returned as a CSRMatrix.
+
     :param A: first matrix (list of lists)
     :param B: second matrix (list of lists)
+    :param threshold: number of multiply-adds from which NumPy is used
+    :param exact: keep the summation order for float products
     :return: resulting matrix (list of lists)
     :rtype: list of lists
     :raise ValueError:
     """
+
+    if isinstance(A, CSRMatrix) or isinstance(B, CSRMatrix):
+        return _sparse_matrix_mul(CSRMatrix.from_dense(A), CSRMatrix.from_dense(B))
+
+    _check_matrices(A, B)
+
+    if threshold is None:
+        threshold = NUMPY_THRESHOLD
+
+    if np is not None and len(A) * len(B) * len(B[0]) >= threshold:
+        product = _numpy_matrix_mul(A, B, exact)
+        if product is not None:
+            return product
+
+    return _tiled_matrix_mul(A, B)
+
+
+def parallel_matrix_mul(A, B, workers=None):
+    """
+    Multiply two valid matrices A and B (as matrix_mul does) on several
+    processes, each one computing a block of rows of A * B with the
+    pure-Python kernel.
+
+    The matrices are validated once, before any work is dispatched. B is
+    copied once (transposed, as doubles) into shared memory, which every
+    worker reads without it being pickled, and the workers write their
+    blocks of rows directly into a shared output buffer.
+
+    The entries are computed as doubles, so the result holds floats even
+    for integer matrices.
+
+    :param A: first matrix (list of lists)
+    :param B: second matrix (list of lists)
+    :param workers: number of worker processes (defaults to the number
+    of CPUs)
+    :return: resulting matrix (list of lists)
+    :rtype: list of lists
+    :raise ValueError:
+    """
+
+    _check_matrices(A, B)
+
+    workers = workers or os.cpu_count() or 1
+    rows, inner, cols = len(A), len(B), len(B[0])
+    if not cols:
+        return [[] for _ in A]
+
+    b_shm = SharedMemory(create=True, size=max(1, 8 * inner * cols))
+    c_shm = SharedMemory(create=True, size=max(1, 8 * rows * cols))
+    try:
+        b_view = b_shm.buf.cast('d')
+        b_view[:inner * cols] = array('d', chain.from_iterable(zip(*B)))
+        b_view.release()
+
+        step = -(-rows // workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            blocks = [executor.submit(_matrix_mul_block, b_shm.name, c_shm.name, inner, cols, start,
+                                      A[start:start + step])
+                      for start in range(0, rows, step)]
+            for block in blocks:
+                block.result()
+
+        c_view = c_shm.buf.cast('d')
+        product = [c_view[i * cols:(i + 1) * cols].tolist() for i in range(rows)]
+        c_view.release()
+    finally:
+        b_shm.close()
+        b_shm.unlink()
+        c_shm.close()
+        c_shm.unlink()
+
+    return product
+
+
+def _matrix_mul_block(b_name, c_name, inner, cols, start, a_rows):
+    """Worker of parallel_matrix_mul: write the rows start.. of A * B into the shared output."""
+
+    b_shm = SharedMemory(name=b_name)
+    c_shm = SharedMemory(name=c_name)
+    b_view = b_shm.buf.cast('d')
+    c_view = c_shm.buf.cast('d')
+    try:
+        b_cols = [b_view[j * inner:(j + 1) * inner] for j in range(cols)]
+        for i, a_row in enumerate(a_rows, start):
+            c_view[i * cols:(i + 1) * cols] = array('d', [sum(map(mul, a_row, b_col)) for b_col in b_cols])
+        for b_col in b_cols:
+            b_col.release()
+    finally:
+        b_view.release()
+        c_view.release()
+        b_shm.close()
+        c_shm.close()
+
+
+def _check_matrices(A, B):
     a_len = {len(row) for row in A}
     b_len = {len(row) for row in B}
     if len(a_len) != 1 or len(b_len) != 1:
@@ -120,7 +415,472 @@ def matrix_mul(A, B):
     if a_cols != b_rows:
         raise ValueError("Matrix dimensions are not valid")
 
-    mul = [[sum(a*b for a, b in zip(a_row, b_col))
-            for b_col in zip(*B)] for a_row in A]
 
-    return mul
+def _tiled_matrix_mul(A, B, tile=TILE_SIZE):
+    b_cols = list(zip(*B))
+    mul_rows = [[] for _ in A]
+
+    for start in range(0, len(b_cols), tile):
+        block = b_cols[start:start + tile]
+        for a_row, mul_row in zip(A, mul_rows):
+            mul_row.extend([sum(map(mul, a_row, b_col)) for b_col in block])
+
+    return mul_rows
+
+
+def _numpy_matrix_mul(A, B, exact):
+    """Return A * B computed with NumPy, or None if NumPy cannot reproduce the pure-Python result."""
+
+    a = np.array(A)
+    b = np.array(B)
+    if a.dtype.kind not in 'if' or b.dtype.kind not in 'if':
+        return None
+
+    if a.dtype.kind == b.dtype.kind == 'i':
+        bound = int(np.abs(a).max()) * int(np.abs(b).max()) * a.shape[1]
+        return (a @ b).tolist() if bound < 2 ** 63 else None
+
+    if not exact:
+        return (a @ b).tolist()
+
+    if not SEQUENTIAL_SUM:
+        return None
+
+    # Rank-1 updates in column order add the products of each cell in the same order as sum() (before 3.12).
+    product = np.multiply.outer(a[:, 0], b[0])
+    for k in range(1, a.shape[1]):
+        product += np.multiply.outer(a[:, k], b[k])
+
+    return product.tolist()
+
+
+class Vector:
+    """
+    Dense vector of floats stored in a compact buffer of C doubles
+    (8 bytes per entry, instead of a list of boxed floats).
+
+    list_mul, metrics and gradient accept it in place of a list or
+    tuple; list_mul and metrics then build their intermediate results in
+    compact arrays, with the same results as for lists.
+
+    It supports the buffer protocol through memoryview(), so NumPy can
+    use it without copying: np.asarray(vector.memoryview()), or
+    np.asarray(vector) directly. Conversely, Vector.from_buffer wraps an
+    existing buffer of doubles (e.g. a float64 NumPy array) without
+    copying it.
+
+    :param values: iterable of numbers
+    """
+
+    __slots__ = ('_data',)
+
+    def __init__(self, values=()):
+        self._data = array('d', values)
+
+    @classmethod
+    def from_buffer(cls, buffer):
+        """
+        Return a Vector sharing the memory of a contiguous buffer of
+        doubles (an array('d'), a float64 NumPy array, ...)
+
+        :param buffer: object supporting the buffer protocol
+        :return: the vector
+        :rtype: Vector
+        :raise TypeError: if the buffer does not hold doubles
+        """
+
+        view = memoryview(buffer)
+        if view.format != 'd' or not view.c_contiguous or view.ndim != 1:
+            raise TypeError("Buffer must be a contiguous 1-D buffer of doubles")
+
+        vector = cls.__new__(cls)
+        vector._data = view
+
+        return vector
+
+    def memoryview(self):
+        """
+        Return a memoryview of the underlying buffer (no copy)
+
+        :rtype: memoryview
+        """
+
+        return memoryview(self._data)
+
+    def __array__(self, dtype=None, copy=None):
+        values = np.frombuffer(self._data, dtype=float)
+        return values.astype(dtype) if dtype is not None else values
+
+    def tolist(self):
+        """
+        Return the vector as a list
+
+        :rtype: list
+        """
+
+        return self._data.tolist()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __getitem__(self, index):
+        return self._data[index]
+
+    def __eq__(self, other):
+        try:
+            size = len(other)
+        except TypeError:
+            return NotImplemented
+        return len(self) == size and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self):
+        return f'Vector({self.tolist()})'
+
+
+# Vector kernels of metrics and list_mul. They make separate C-level passes rather than one fused loop, and
+# total with sum() as the list code does: accumulating with += would only give the same results before
+# Python 3.12 (see SEQUENTIAL_SUM).
+
+def _vector_metrics(u, v):
+    diffs = array('d', map(sub, u, v))
+
+    return (sum(map(abs, diffs)), sqrt(sum(map(mul, diffs, diffs))))
+
+
+def _vector_list_mul(u, v):
+    vprod = array('d', map(mul, u, v))
+
+    return Vector.from_buffer(array('d', map(add, u, v))), Vector.from_buffer(vprod), sum(vprod)
+
+
+class SparseVector:
+    """
+    Vector of a given size stored as the sorted indices of its nonzero
+    entries and their values, in compact arrays.
+
+    list_mul and metrics accept it in place of a list, so that their cost
+    depends on the number of nonzero entries rather than on the size.
+
+    E.g., SparseVector.from_dense([0, 2, 0, 3]) has size 4, indices
+    [1, 3] and values [2.0, 3.0]
+
+    :param size: number of entries of the vector
+    :param indices: increasing indices of the nonzero entries
+    :param values: values of the nonzero entries
+    :raise ValueError: if the indices are not increasing, are outside of
+    the vector, or do not match the values
+    """
+
+    __slots__ = ('size', 'indices', 'values')
+
+    def __init__(self, size, indices=(), values=()):
+        self.size = size
+        self.indices = array('q', indices)
+        self.values = array('d', values)
+
+        if len(self.indices) != len(self.values):
+            raise ValueError("Sparse vector needs one value per index")
+        _check_indices(self.indices, size)
+
+    @classmethod
+    def from_dense(cls, vector):
+        """
+        Return the sparse version of a vector
+
+        :param vector: a vector (list) or a SparseVector
+        :return: the sparse vector
+        :rtype: SparseVector
+        """
+
+        if isinstance(vector, cls):
+            return vector
+
+        nonzero = [(i, val) for i, val in enumerate(vector) if val]
+
+        return cls(len(vector), (i for i, _ in nonzero), (val for _, val in nonzero))
+
+    def to_dense(self):
+        """
+        Return the vector as a list
+
+        :rtype: list
+        """
+
+        dense = [0.0] * self.size
+        for i, val in zip(self.indices, self.values):
+            dense[i] = val
+
+        return dense
+
+    @property
+    def nnz(self):
+        """Number of stored (nonzero) entries"""
+
+        return len(self.values)
+
+    def __len__(self):
+        return self.size
+
+    def __repr__(self):
+        return f'SparseVector({self.size}, {self.indices.tolist()}, {self.values.tolist()})'
+
+
+class CSRMatrix:
+    """
+    Matrix stored in compressed sparse row (CSR) format, in compact
+    arrays: the nonzero entries of row i are data[indptr[i]:indptr[i+1]],
+    in the columns indices[indptr[i]:indptr[i+1]] (increasing).
+
+    matrix_mul accepts it in place of a list of lists, so that its cost
+    depends on the number of nonzero entries rather than on the size.
+
+    :param shape: (number of rows, number of columns)
+    :param indptr: start of each row in indices and data, followed by
+    the number of nonzero entries
+    :param indices: column of each nonzero entry
+    :param data: value of each nonzero entry
+    :raise ValueError: if indptr does not delimit one row per row of the
+    shape, or the columns of a row are not increasing or are outside of
+    the shape
+    """
+
+    __slots__ = ('shape', 'indptr', 'indices', 'data')
+
+    def __init__(self, shape, indptr, indices, data):
+        self.shape = tuple(shape)
+        self.indptr = array('q', indptr)
+        self.indices = array('q', indices)
+        self.data = array('d', data)
+
+        n_rows, n_cols = self.shape
+        if (len(self.indptr) != n_rows + 1 or self.indptr[0] != 0
+                or self.indptr[-1] != len(self.indices) or len(self.indices) != len(self.data)):
+            raise ValueError("CSR arrays do not match the shape")
+        for i in range(n_rows):
+            start, end = self.indptr[i], self.indptr[i + 1]
+            if end < start:
+                raise ValueError("CSR row pointers must not decrease")
+            _check_indices(self.indices[start:end], n_cols)
+
+    @classmethod
+    def from_dense(cls, matrix):
+        """
+        Return the CSR version of a matrix
+
+        :param matrix: a matrix (list of lists) or a CSRMatrix
+        :return: the sparse matrix
+        :rtype: CSRMatrix
+        :raise ValueError: if the rows of the matrix have different lengths
+        """
+
+        if isinstance(matrix, cls):
+            return matrix
+
+        if len({len(row) for row in matrix}) != 1:
+            raise ValueError("Matrices are not valid")
+
+        indptr = [0]
+        indices = array('q')
+        data = array('d')
+        for row in matrix:
+            for j, val in enumerate(row):
+                if val:
+                    indices.append(j)
+                    data.append(val)
+            indptr.append(len(data))
+
+        return cls((len(matrix), len(matrix[0])), indptr, indices, data)
+
+    @classmethod
+    def from_coo(cls, shape, rows, cols, values):
+        """
+        Return a CSR matrix built from coordinate (COO) triplets, in any
+        order. Values given for the same cell are added up.
+
+        :param shape: (number of rows, number of columns)
+        :param rows: row of each value
+        :param cols: column of each value
+        :param values: values
+        :return: the sparse matrix
+        :rtype: CSRMatrix
+        :raise ValueError: if a coordinate is outside of the shape
+        """
+
+        n_rows, n_cols = shape
+        cells = {}
+        for i, j, val in zip(rows, cols, values):
+            if not (0 <= i < n_rows and 0 <= j < n_cols):
+                raise ValueError(f"Coordinates ({i}, {j}) are outside of a {n_rows} x {n_cols} matrix")
+            cells[i, j] = cells.get((i, j), 0) + val
+
+        indptr = [0] * (shape[0] + 1)
+        indices = array('q')
+        data = array('d')
+        for (i, j), val in sorted(cells.items()):
+            if val:
+                indptr[i + 1] += 1
+                indices.append(j)
+                data.append(val)
+
+        for i in range(shape[0]):
+            indptr[i + 1] += indptr[i]
+
+        return cls(shape, indptr, indices, data)
+
+    def to_dense(self):
+        """
+        Return the matrix as a list of lists
+
+        :rtype: list of lists
+        """
+
+        dense = [[0.0] * self.shape[1] for _ in range(self.shape[0])]
+        for i, row in enumerate(dense):
+            for k in range(self.indptr[i], self.indptr[i + 1]):
+                row[self.indices[k]] = self.data[k]
+
+        return dense
+
+    def row(self, i):
+        """
+        Return a row of the matrix
+
+        :param i: index of the row
+        :rtype: SparseVector
+        """
+
+        start, end = self.indptr[i], self.indptr[i + 1]
+
+        return SparseVector(self.shape[1], self.indices[start:end], self.data[start:end])
+
+    @property
+    def nnz(self):
+        """Number of stored (nonzero) entries"""
+
+        return len(self.data)
+
+    def __repr__(self):
+        return f'CSRMatrix({self.shape}, nnz={self.nnz})'
+
+
+def _check_indices(indices, size):
+    if len(indices) and indices[0] < 0:
+        raise ValueError(f"Sparse index {indices[0]} is outside of a dimension of size {size}")
+
+    previous = -1
+    for index in indices:
+        if index <= previous:
+            raise ValueError("Sparse indices must be strictly increasing")
+        previous = index
+    if previous >= size:
+        raise ValueError(f"Sparse index {previous} is outside of a dimension of size {size}")
+
+
+def _sparse_pair(u, v):
+    u = SparseVector.from_dense(u)
+    v = SparseVector.from_dense(v)
+    if u.size != v.size:
+        raise ValueError("Vector dimensions do not match")
+
+    return u, v
+
+
+def _union(u, v):
+    """Yield (index, value in u, value in v) for every index where u or v is nonzero, in order."""
+
+    u_len = len(u.indices)
+    v_len = len(v.indices)
+    i = j = 0
+
+    while i < u_len and j < v_len:
+        u_index = u.indices[i]
+        v_index = v.indices[j]
+        if u_index == v_index:
+            yield u_index, u.values[i], v.values[j]
+            i += 1
+            j += 1
+        elif u_index < v_index:
+            yield u_index, u.values[i], 0.0
+            i += 1
+        else:
+            yield v_index, 0.0, v.values[j]
+            j += 1
+
+    for k in range(i, u_len):
+        yield u.indices[k], u.values[k], 0.0
+    for k in range(j, v_len):
+        yield v.indices[k], 0.0, v.values[k]
+
+
+def _intersection(u, v):
+    """Yield (index, value in u, value in v) for every index where both u and v are nonzero, in order."""
+
+    u_len = len(u.indices)
+    v_len = len(v.indices)
+    i = j = 0
+
+    while i < u_len and j < v_len:
+        u_index = u.indices[i]
+        v_index = v.indices[j]
+        if u_index == v_index:
+            yield u_index, u.values[i], v.values[j]
+            i += 1
+            j += 1
+        elif u_index < v_index:
+            i += 1
+        else:
+            j += 1
+
+
+def _sparse_metrics(u, v):
+    # Totalled with sum(), as the list code is (see SEQUENTIAL_SUM); the zero terms it skips do not change it.
+    diffs = [a - b for _, a, b in _union(u, v)]
+
+    return (sum(map(abs, diffs)), sqrt(sum([diff * diff for diff in diffs])))
+
+
+def _sparse_list_mul(u, v):
+    vsum = SparseVector(u.size)
+    for i, a, b in _union(u, v):
+        if a + b:
+            vsum.indices.append(i)
+            vsum.values.append(a + b)
+
+    vprod = SparseVector(u.size)
+    for i, a, b in _intersection(u, v):
+        if a * b:
+            vprod.indices.append(i)
+            vprod.values.append(a * b)
+
+    return vsum, vprod, sum(vprod.values)
+
+
+def _sparse_matrix_mul(A, B):
+    """Gustavson's row-by-row product of two CSR matrices."""
+
+    if A.shape[1] != B.shape[0]:
+        raise ValueError("Matrix dimensions are not valid")
+
+    indptr = [0]
+    indices = array('q')
+    data = array('d')
+
+    for i in range(A.shape[0]):
+        row = {}
+        for k in range(A.indptr[i], A.indptr[i + 1]):
+            a = A.data[k]
+            b_row = A.indices[k]
+            for m in range(B.indptr[b_row], B.indptr[b_row + 1]):
+                col = B.indices[m]
+                row[col] = row.get(col, 0.0) + a * B.data[m]
+
+        for col in sorted(row):
+            if row[col]:
+                indices.append(col)
+                data.append(row[col])
+        indptr.append(len(data))
+
+    return CSRMatrix((A.shape[0], B.shape[1]), indptr, indices, data)
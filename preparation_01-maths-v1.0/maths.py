@@ -3,9 +3,15 @@ This file contains a set of functions to practice your
 maths skills.
 
 It needs to be completed with "vanilla" Python, without
-help from any library.
+help from any library -- except for derivative_batch, which
+requires NumPy.
 """
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 def derivative(w1, w2, x):
     """
@@ -22,6 +28,29 @@ def derivative(w1, w2, x):
     return (3 * w1 * x * x) + w2
 
 
+def derivative_batch(w1, w2, x):
+    """
+    Batched version of derivative: evaluate the derivative of
+    f(x) = w1 * x^3 + w2 * x - 1 at many points, for one or many pairs of
+    coefficients, in one vectorised call. w1, w2 and x are broadcast
+    together.
+
+    :param w1: first coefficient(s) (array-like)
+    :param w2: second coefficient(s) (array-like)
+    :param x: points on which to evaluate derivative (array-like)
+    :return: values of the derivative
+    :rtype: np.ndarray
+    """
+
+    if np is None:
+        raise ImportError("derivative_batch requires NumPy")
+
+    w1 = np.asarray(w1, dtype=float)
+    x = np.asarray(x, dtype=float)
+
+    return derivative(w1, np.asarray(w2, dtype=float), x)
+
+
 def abs_dist(x):
     """
     Return the absolute value of x
@@ -34,6 +63,12 @@ def abs_dist(x):
     return abs(x)
 
 
+# Memo table of factorials, _FACTORIALS[i] == fact(i). It grows on demand up to FACTORIAL_TABLE_SIZE entries;
+# larger factorials start from its last entry.
+FACTORIAL_TABLE_SIZE = 1024
+_FACTORIALS = [1]
+
+
 def fact(x):
     """
     Return the factorial of x.
@@ -49,9 +84,15 @@ def fact(x):
     if x < 0:
         raise ValueError("Input cannot be negative")
 
-    fac = 1
+    if x < len(_FACTORIALS):
+        return _FACTORIALS[x]
+
+    while len(_FACTORIALS) < min(x + 1, FACTORIAL_TABLE_SIZE):
+        _FACTORIALS.append(_FACTORIALS[-1] * len(_FACTORIALS))
+
+    fac = _FACTORIALS[-1]
 
-    for n in range(x, 1, -1):
+    for n in range(len(_FACTORIALS), x + 1):
         fac = fac * n
 
     return fac
@@ -63,10 +104,82 @@ def combination(n, r):
     what is the number of possible ways
     to choose r items from it?
 
+    The result is computed exactly with the multiplicative formula
+    C(n, r) = prod((n - r + i) / i for i in 1..r), using the smaller of
+    r and n - r, so it never builds the factorials of n, r and n - r.
+
     :param n: total number of items (integer)
     :param r: number of items to arrange (int)
     :return: number of combinations
     :rtype: integer
+    :raise ValueError: if n or r is negative, or r is greater than n
+    """
+
+    if n < 0 or r < 0:
+        raise ValueError("Input cannot be negative")
+    if r > n:
+        raise ValueError("Cannot choose more items than available")
+
+    r = min(r, n - r)
+    comb = 1
+
+    for i in range(1, r + 1):
+        comb = comb * (n - r + i) // i
+
+    return comb
+
+
+def pascal_row(n):
+    """
+    Return the row n of Pascal's triangle, that is
+    [combination(n, 0), combination(n, 1), ..., combination(n, n)]
+
+    :param n: total number of items (integer)
+    :return: number of combinations for every r from 0 to n
+    :rtype: list of integers
+    :raise ValueError: if n is negative
+    """
+
+    if n < 0:
+        raise ValueError("Input cannot be negative")
+
+    row = [1] * (n + 1)
+
+    for r in range(1, n // 2 + 1):
+        row[r] = row[n - r] = row[r - 1] * (n - r + 1) // r
+
+    return row
+
+
+def combinations(pairs):
+    """
+    Return combination(n, r) for many (n, r) pairs.
+
+    For each n, the row of Pascal's triangle is computed once, but only
+    up to the largest min(r, n - r) requested for that n (the row is
+    symmetric), so this never costs more than one combination call per
+    distinct n with its largest r.
+
+    :param pairs: iterable of (n, r) tuples
+    :return: number of combinations for each pair, in the same order
+    :rtype: list of integers
+    :raise ValueError: if any n or r is negative, or any r is greater than n
     """
 
-    return fact(n) / (fact(r) * fact(n-r))
+    pairs = list(pairs)
+    depths = {}
+    for n, r in pairs:
+        if n < 0 or r < 0:
+            raise ValueError("Input cannot be negative")
+        if r > n:
+            raise ValueError("Cannot choose more items than available")
+        depths[n] = max(depths.get(n, 0), min(r, n - r))
+
+    rows = {}
+    for n, depth in depths.items():
+        row = [1]
+        for r in range(1, depth + 1):
+            row.append(row[-1] * (n - r + 1) // r)
+        rows[n] = row
+
+    return [rows[n][min(r, n - r)] for n, r in pairs]
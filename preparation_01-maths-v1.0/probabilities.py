@@ -5,9 +5,27 @@ probabilities skills.
 It needs to be completed with "vanilla" Python, without
 help from any library -- except for the bin_dist function
 for which you can use scipy.
+
+The *_array functions are NumPy versions of the functions above, which
+evaluate whole grids of arguments (with broadcasting) in one call.
 """
 
-from scipy.special import comb
+from bisect import bisect_left
+from functools import lru_cache
+from itertools import accumulate
+from math import exp, lgamma, log, log1p
+from operator import neg
+
+import numpy as np
+from scipy.special import bdtr, comb, gammaln, xlog1py, xlogy
+
+# Number of (n, p) distributions kept by binomial().
+BINOMIAL_CACHE_SIZE = 128
+
+# Largest n for which the binomial coefficients fit in a float. Up to it,
+# bin_cdf sums the exact bin_dist terms and Binomial builds its table from
+# them; above it, bin_cdf calls scipy's bdtr and Binomial works in log-space.
+DIRECT_SUM_MAX_TRIALS = 1000
 
 
 def head_tails(p, n):
@@ -71,4 +89,258 @@ def bin_cdf(n, p, x):
     if x > n:
         raise ValueError("Successes cannot be greater than number of trials")
 
-    return sum([bin_dist(n, p, cum) for cum in range(x+1)])
+    if x == n:
+        return 1.0
+
+    if n <= DIRECT_SUM_MAX_TRIALS:
+        return sum([bin_dist(n, p, cum) for cum in range(x+1)])
+
+    return float(bdtr(x, n, p)) if x >= 0 else 0.0
+
+
+class Binomial:
+    """
+    Binomial distribution of the number of successes in n trials,
+    each with probability p of success.
+
+    The whole probability mass function is computed once: from the same
+    terms as bin_dist up to DIRECT_SUM_MAX_TRIALS trials, and above that
+    in log-space, starting from its mode and using the ratio recurrence
+
+        P(k + 1) / P(k) = (n - k) / (k + 1) * p / (1 - p)
+
+    so that terms far in the tails do not underflow before the others
+    are computed. The cumulative and survival tables are kept alongside
+    it, so that pmf, cdf and sf are table lookups and quantile is a
+    binary search on one of the last two. The tables hold 3 * (n + 1)
+    floats, so they are only worth building for repeated queries on the
+    same distribution; bin_cdf does not build them.
+
+    :param n: number of trials (int)
+    :param p: probability of success
+    :raise ValueError: if n is negative or p is not a probability
+    """
+
+    def __init__(self, n, p):
+        if n < 0:
+            raise ValueError("Number of trials cannot be negative")
+        if not 0 <= p <= 1:
+            raise ValueError("Probability must be between 0 and 1")
+
+        self.n = n
+        self.p = p
+
+        if p in (0, 1):
+            self._pmf = [0.0] * (n + 1)
+            self._pmf[n if p == 1 else 0] = 1.0
+        elif n <= DIRECT_SUM_MAX_TRIALS:
+            self._pmf = [comb(n, k) * p**k * (1-p)**(n-k) for k in range(n + 1)]
+        else:
+            self._pmf = [exp(value) for value in self._log_pmf(n, p)]
+
+        self._cdf = list(accumulate(self._pmf))
+        self._sf = list(accumulate(reversed(self._pmf[1:])))[::-1] + [0.0]
+
+    @staticmethod
+    def _log_pmf(n, p):
+        log_p = log(p)
+        log_q = log1p(-p)
+        log_ratio = log_p - log_q
+
+        mode = min(int((n + 1) * p), n)
+        logs = [0.0] * (n + 1)
+        logs[mode] = lgamma(n + 1) - lgamma(mode + 1) - lgamma(n - mode + 1) + mode * log_p + (n - mode) * log_q
+
+        for k in range(mode, n):
+            logs[k + 1] = logs[k] + log(n - k) - log(k + 1) + log_ratio
+        for k in range(mode, 0, -1):
+            logs[k - 1] = logs[k] + log(k) - log(n - k + 1) - log_ratio
+
+        return logs
+
+    def pmf(self, x):
+        """
+        Return the probability of having exactly x successes
+
+        :param x: number of successes (int)
+        :return: probability of having x successes
+        :rtype: float
+        :raise ValueError: if x > n
+        """
+
+        if x > self.n:
+            raise ValueError("Successes cannot be greater than number of trials")
+
+        return self._pmf[x] if x >= 0 else 0.0
+
+    def cdf(self, x):
+        """
+        Return the probability of having less than or equal to x successes
+
+        :param x: number of successes (int)
+        :return: probability of having less than or equal to x successes
+        :rtype: float
+        :raise ValueError: if x > n
+        """
+
+        if x > self.n:
+            raise ValueError("Successes cannot be greater than number of trials")
+
+        if x == self.n:
+            return 1.0
+
+        return min(self._cdf[x], 1.0) if x >= 0 else 0.0
+
+    def sf(self, x):
+        """
+        Return the probability of having more than x successes, summed
+        from the upper tail rather than computed as 1 - cdf(x)
+
+        :param x: number of successes (int)
+        :return: probability of having more than x successes
+        :rtype: float
+        :raise ValueError: if x > n
+        """
+
+        if x > self.n:
+            raise ValueError("Successes cannot be greater than number of trials")
+
+        return min(self._sf[x], 1.0) if x >= 0 else 1.0
+
+    def quantile(self, q):
+        """
+        Return the smallest number of successes x such that cdf(x) >= q
+
+        Quantiles above the median are searched for in the survival table
+        instead, as the smallest x such that sf(x) <= 1 - q: the
+        cumulative table is summed from the lower tail, so near 1 it can
+        reach 1 (or exceed it, by rounding) well before n.
+
+        :param q: probability
+        :return: number of successes
+        :rtype: int
+        :raise ValueError: if q is not a probability
+        """
+
+        if not 0 <= q <= 1:
+            raise ValueError("Probability must be between 0 and 1")
+
+        if q > 0.5:
+            return min(bisect_left(self._sf, q - 1, key=neg), self.n)
+
+        return min(bisect_left(self._cdf, q), self.n)
+
+
+@lru_cache(maxsize=BINOMIAL_CACHE_SIZE)
+def binomial(n, p):
+    """
+    Return a Binomial(n, p) distribution, shared between the calls made
+    with the same n and p (up to BINOMIAL_CACHE_SIZE of them, each
+    holding 3 * (n + 1) floats)
+
+    :param n: number of trials (int)
+    :param p: probability of success
+    :return: the distribution
+    :rtype: Binomial
+    """
+
+    return Binomial(n, p)
+
+
+def _successes_check(n, x, masked):
+    """
+    Broadcast n and x together and return the mask of the entries where
+    x > n, raising a ValueError instead if there are any and masked is
+    false.
+    """
+
+    invalid = np.asarray(x) > np.asarray(n)
+    if not masked and invalid.any():
+        raise ValueError("Successes cannot be greater than number of trials")
+
+    return invalid
+
+
+def head_tails_array(p, n):
+    """
+    Vectorised head_tails: the probability of having n heads in a row,
+    for arrays of p and n (broadcast together)
+
+    :param p: probabilities of a head (array-like)
+    :param n: numbers of heads in a row (array-like of ints)
+    :return: probabilities of having n heads in a row
+    :rtype: np.ndarray
+    """
+
+    return np.power(np.asarray(p, dtype=float), n)
+
+
+def log_head_tails(p, n):
+    """
+    Natural logarithm of head_tails, n * log(p), which does not underflow
+    for large n. Accepts scalars or arrays (broadcast together).
+
+    :param p: probabilities of a head
+    :param n: numbers of heads in a row
+    :return: log-probabilities of having n heads in a row (-inf where
+    p is 0)
+    :rtype: float | np.ndarray
+    """
+
+    return xlogy(n, p)
+
+
+def bin_dist_array(n, p, x, masked=False):
+    """
+    Vectorised bin_dist: the probability of having x successes in n
+    trials, for arrays of n, p and x (broadcast together).
+
+    The terms are computed in log-space, so they do not overflow or
+    underflow for large n before being exponentiated.
+
+    As with bin_dist, a ValueError is raised if any x is higher than
+    its n. With masked, those entries are masked in the result instead.
+
+    :param n: numbers of trials (array-like of ints)
+    :param p: probabilities of success (array-like)
+    :param x: numbers of successes (array-like of ints)
+    :param masked: mask the entries where x > n instead of raising
+    :return: probabilities of having x successes
+    :rtype: np.ndarray | np.ma.MaskedArray
+    :raise ValueError: if any x > n and masked is false
+    """
+
+    n, p, x = np.broadcast_arrays(np.asarray(n), np.asarray(p, dtype=float), np.asarray(x))
+    invalid = _successes_check(n, x, masked)
+
+    k = np.clip(x, 0, n)
+    log_pmf = gammaln(n + 1) - gammaln(k + 1) - gammaln(n - k + 1) + xlogy(k, p) + xlog1py(n - k, -p)
+    result = np.where(x < 0, 0.0, np.exp(log_pmf))
+
+    return np.ma.masked_array(result, invalid) if masked else result
+
+
+def bin_cdf_array(n, p, x, masked=False):
+    """
+    Vectorised bin_cdf: the probability of having less than or equal to
+    x successes in n trials, for arrays of n, p and x (broadcast
+    together).
+
+    As with bin_cdf, a ValueError is raised if any x is higher than its
+    n. With masked, those entries are masked in the result instead.
+
+    :param n: numbers of trials (array-like of ints)
+    :param p: probabilities of success (array-like)
+    :param x: numbers of successes (array-like of ints)
+    :param masked: mask the entries where x > n instead of raising
+    :return: probabilities of having less than or equal to x successes
+    :rtype: np.ndarray | np.ma.MaskedArray
+    :raise ValueError: if any x > n and masked is false
+    """
+
+    n, p, x = np.broadcast_arrays(np.asarray(n), np.asarray(p, dtype=float), np.asarray(x))
+    invalid = _successes_check(n, x, masked)
+
+    result = np.where(x < 0, 0.0, bdtr(np.clip(x, 0, n), n, p))
+
+    return np.ma.masked_array(result, invalid) if masked else result
@@ -6,7 +6,17 @@ It needs to be completed with "vanilla" Python, without
 help from any library.
 """
 
+from collections import deque
 from math import sqrt
+from random import randrange
+
+# Scale factor turning the median absolute deviation into an estimate of
+# the standard deviation, for normally distributed data.
+MAD_SCALE = 1.4826
+
+# Same for the mean absolute deviation (sqrt(pi / 2)), used by remove_outliers
+# when more than half the points are equal and the MAD is 0.
+MEAN_AD_SCALE = 1.2533
 
 
 def calculate_mean(data):
@@ -15,12 +25,18 @@ def calculate_mean(data):
 
     If data is empty raise a ValueError
 
+    Data without a length (e.g. a generator) is consumed in a single
+    pass with a RunningStats accumulator instead of being stored.
+
     :param data: a list of numbers
     :return: the mean of the list
     :rtype: float
     :raise ValueError:
     """
 
+    if not hasattr(data, '__len__'):
+        return RunningStats(data).mean
+
     if not data:
         raise ValueError("List cannot be empty")
 
@@ -34,12 +50,18 @@ def calculate_standard_deviation(data):
 
     If data is empty raise a ValueError
 
+    Data without a length (e.g. a generator) is consumed in a single
+    pass with a RunningStats accumulator instead of being stored.
+
     :param data: list of numbers
     :return: the standard deviation of the list
     :rtype: float
     :raise ValueError:
     """
 
+    if not hasattr(data, '__len__'):
+        return RunningStats(data).std
+
     if not data:
         raise ValueError("List cannot be empty")
 
@@ -48,32 +70,331 @@ def calculate_standard_deviation(data):
     return sqrt(calculate_mean([(val-xbar) * (val-xbar) for val in data]))
 
 
-def remove_outliers(data):
+def remove_outliers(data, method='std'):
     """
     Given a list of numbers, find outliers and return a new
     list that contains all points except outliers
     We consider points lying outside 2 standard
     deviations from the mean.
 
+    With method='mad', the mean and standard deviation are replaced by
+    the median and the scaled median absolute deviation
+    (MAD_SCALE * MAD), which are not skewed by the outliers themselves.
+    If more than half the points are equal (so the MAD is 0), the scaled
+    mean absolute deviation from the median is used instead, and if every
+    point is equal they are all kept.
+    A NumPy array is then filtered as a whole and returned as a new
+    array.
+
     Make sure that you do not modify the original list!
 
     If data is empty raise a ValueError
 
     :param data: list of numbers
+    :param method: 'std' (mean and standard deviation) or 'mad' (median
+    and median absolute deviation)
     :return: a new list without outliers
     :rtype: list
     :raise ValueError:
     """
 
-    if not data:
+    if len(data) == 0:
         raise ValueError("List cannot be empty")
 
     if len(data) == 1:
         return data
 
+    if method == 'mad':
+        med = calculate_median(data)
+        is_array = hasattr(data, 'dtype')
+        deviations = abs(data - med) if is_array else [abs(val - med) for val in data]
+        limit = 2 * MAD_SCALE * calculate_median(deviations)
+        if not limit:
+            limit = 2 * MEAN_AD_SCALE * (deviations.mean() if is_array else calculate_mean(deviations))
+        if not limit:
+            return data.copy() if is_array else list(data)
+        if is_array:
+            return data[deviations < limit]
+        return [val for val, deviation in zip(data, deviations) if deviation < limit]
+
+    if method != 'std':
+        raise ValueError("Unknown method, expected 'std' or 'mad'")
+
     xbar = calculate_mean(data)
-    std_dev = calculate_standard_deviation(data)
+    std_dev = sqrt(calculate_mean([(val-xbar) * (val-xbar) for val in data]))
     max_val = xbar + (2 * std_dev)
     min_val = xbar - (2 * std_dev)
 
     return [val for val in data if min_val < val < max_val]
+
+
+def calculate_median(data):
+    """
+    Return the median of a python list (or of a NumPy array), without
+    sorting it: the middle values are found with quickselect, in
+    expected linear time (or with np.partition for arrays).
+
+    The data is not modified.
+
+    If data is empty raise a ValueError
+
+    :param data: list of numbers
+    :return: the median of the list
+    :rtype: float
+    :raise ValueError:
+    """
+
+    if len(data) == 0:
+        raise ValueError("List cannot be empty")
+
+    middle = len(data) // 2
+
+    if hasattr(data, 'partition'):
+        values = data.copy()
+        values.partition([middle - 1, middle] if middle else middle)
+        lower, upper = values[middle - 1], values[middle]
+    else:
+        upper = _select(data, middle)
+        lower = upper
+        if not len(data) % 2:
+            below = [val for val in data if val < upper]
+            if len(below) == middle:
+                lower = max(below)
+
+    return upper if len(data) % 2 else (lower + upper) / 2
+
+
+def calculate_mad(data, med=None):
+    """
+    Return the median absolute deviation of a python list (or of a
+    NumPy array), i.e. the median of the absolute deviations from the
+    median.
+
+    If data is empty raise a ValueError
+
+    :param data: list of numbers
+    :param med: median of the data, if already known
+    :return: the median absolute deviation of the list
+    :rtype: float
+    :raise ValueError:
+    """
+
+    if med is None:
+        med = calculate_median(data)
+
+    if hasattr(data, 'dtype'):
+        return calculate_median(abs(data - med))
+
+    return calculate_median([abs(val - med) for val in data])
+
+
+def _select(data, k):
+    """Return the k-th smallest value (from 0) of a list with quickselect."""
+
+    values = data
+    while True:
+        pivot = values[randrange(len(values))]
+        lower = [val for val in values if val < pivot]
+        if k < len(lower):
+            values = lower
+            continue
+
+        upper = [val for val in values if val > pivot]
+        equal = len(values) - len(lower) - len(upper)
+        if k < len(lower) + equal:
+            return pivot
+
+        k -= len(lower) + equal
+        values = upper
+
+
+def filter_outliers(data, window=None):
+    """
+    Generator version of remove_outliers, for data which does not fit
+    in a list.
+
+    Without window, the data is read twice: once to compute its mean and
+    standard deviation (with a RunningStats accumulator), and once to
+    yield the points lying strictly within 2 standard deviations of the
+    mean, as remove_outliers does. The data must therefore be
+    re-iterable (a list, a range, a NumPy memory-mapped array, ...), not
+    an iterator. A single point is always kept.
+
+    With window, the data is read once and each point is compared
+    against the mean and standard deviation of the window previous
+    points: it is dropped if it lies outside 2 standard deviations of
+    them. The statistics of the window are updated in O(1) per point,
+    so this works on live streams. Points are always kept until the
+    window holds at least two points.
+
+    :param data: iterable of numbers
+    :param window: number of trailing points to compare each point against
+    :return: the points which are not outliers, in order
+    :rtype: iterator
+    :raise ValueError: if data is empty (two-pass mode) or window is
+    lower than 2
+    :raise TypeError: if data is an iterator (two-pass mode)
+    """
+
+    if window is None:
+        return _filter_outliers_two_pass(data)
+
+    if window < 2:
+        raise ValueError("Window must hold at least two points")
+
+    return _filter_outliers_rolling(data, window)
+
+
+def _filter_outliers_two_pass(data):
+    if iter(data) is data:
+        raise TypeError("Data must be re-iterable, not an iterator")
+
+    stats = RunningStats(data)
+    if stats.count == 1:
+        yield from data
+        return
+
+    xbar = stats.mean
+    std_dev = stats.std
+    max_val = xbar + (2 * std_dev)
+    min_val = xbar - (2 * std_dev)
+
+    for val in data:
+        if min_val < val < max_val:
+            yield val
+
+
+def _filter_outliers_rolling(data, window):
+    trailing = deque()
+    xbar = 0.0
+    m_2 = 0.0
+
+    for val in data:
+        count = len(trailing)
+
+        if count < 2:
+            yield val
+        else:
+            two_std = 2 * sqrt(max(m_2, 0.0) / count)
+            if xbar - two_std <= val <= xbar + two_std:
+                yield val
+
+        trailing.append(val)
+        if count < window:
+            delta = val - xbar
+            xbar += delta / (count + 1)
+            m_2 += delta * (val - xbar)
+        else:
+            old = trailing.popleft()
+            old_xbar = xbar
+            xbar += (val - old) / window
+            m_2 += (val - old) * (val - xbar + old - old_xbar)
+
+
+class RunningStats:
+    """
+    Single-pass accumulator of the count, mean and population standard
+    deviation of a stream of numbers, using Welford's algorithm.
+
+    It consumes any iterable (including generators) in O(1) memory.
+    Accumulators built on different chunks of the data can be merged
+    with merge() (or +), using Chan et al.'s parallel formula, so the
+    chunks can be processed separately, e.g. on different workers.
+
+    E.g., (RunningStats([1, 2]) + RunningStats([3, 4])).mean is 2.5
+
+    :param data: optional iterable of numbers to start with
+    """
+
+    def __init__(self, data=()):
+        self.count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.extend(data)
+
+    def push(self, value):
+        """
+        Add a single value
+
+        :param value: a number
+        """
+
+        self.count += 1
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+
+    def extend(self, data):
+        """
+        Add every value of an iterable
+
+        :param data: iterable of numbers
+        :return: the accumulator itself
+        :rtype: RunningStats
+        """
+
+        for value in data:
+            self.push(value)
+
+        return self
+
+    def merge(self, other):
+        """
+        Return a new accumulator holding the values of both accumulators
+
+        :param other: another accumulator
+        :return: merged accumulator
+        :rtype: RunningStats
+        """
+
+        merged = RunningStats()
+        merged.count = self.count + other.count
+        if not merged.count:
+            return merged
+
+        delta = other._mean - self._mean
+        merged._mean = self._mean + delta * other.count / merged.count
+        merged._m2 = self._m2 + other._m2 + delta * delta * self.count * other.count / merged.count
+
+        return merged
+
+    __add__ = merge
+
+    @property
+    def mean(self):
+        """
+        Mean of the values
+
+        :rtype: float
+        :raise ValueError: if no value was added
+        """
+
+        if not self.count:
+            raise ValueError("List cannot be empty")
+
+        return self._mean
+
+    @property
+    def variance(self):
+        """
+        Variance of the values, using the population size (N)
+
+        :rtype: float
+        :raise ValueError: if no value was added
+        """
+
+        if not self.count:
+            raise ValueError("List cannot be empty")
+
+        return self._m2 / self.count
+
+    @property
+    def std(self):
+        """
+        Standard deviation of the values, using the population size (N)
+
+        :rtype: float
+        :raise ValueError: if no value was added
+        """
+
+        return sqrt(self.variance)
@@ -0,0 +1,322 @@
+import random
+from array import array
+from fractions import Fraction
+from operator import mul
+
+import numpy as np
+import pytest
+
+from linear_algebra import (TILE_SIZE, CSRMatrix, SparseVector, Vector, gradient, gradient_batch, knn, list_mul,
+                            matrix_mul, metrics, pairwise_metrics, parallel_matrix_mul)
+
+
+def _sparse_list(rng, size, density=0.2):
+    return [rng.uniform(-10, 10) if rng.random() < density else 0.0 for _ in range(size)]
+
+
+def _sparse_matrix(rng, rows, cols, density=0.2):
+    # Small integers, so that the products are exact whatever the summation order.
+    return [[float(rng.randint(-9, 9)) if rng.random() < density else 0.0 for _ in range(cols)]
+            for _ in range(rows)]
+
+
+def test_sparse_vector_round_trip():
+    vector = SparseVector.from_dense([0, 2, 0, 3])
+
+    assert len(vector) == 4
+    assert vector.indices.tolist() == [1, 3]
+    assert vector.values.tolist() == [2.0, 3.0]
+    assert vector.nnz == 2
+    assert vector.to_dense() == [0.0, 2.0, 0.0, 3.0]
+    assert SparseVector.from_dense(vector) is vector
+    assert SparseVector(3).to_dense() == [0.0, 0.0, 0.0]
+
+
+@pytest.mark.parametrize('indices, values', [
+    ([1, 1], [1.0, 2.0]),
+    ([2, 1], [1.0, 2.0]),
+    ([-1], [1.0]),
+    ([4], [1.0]),
+    ([1, 2], [1.0]),
+])
+def test_sparse_vector_validation(indices, values):
+    with pytest.raises(ValueError):
+        SparseVector(4, indices, values)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_sparse_metrics_and_list_mul_equal_dense(seed):
+    rng = random.Random(seed)
+    u = _sparse_list(rng, 200)
+    v = _sparse_list(rng, 200)
+
+    assert metrics(SparseVector.from_dense(u), v) == metrics(u, v)
+    assert metrics(u, SparseVector.from_dense(v)) == metrics(u, v)
+
+    vsum, vprod, dprod = list_mul(SparseVector.from_dense(u), SparseVector.from_dense(v))
+    expected = list_mul(u, v)
+    assert vsum.to_dense() == expected[0]
+    assert vprod.to_dense() == expected[1]
+    assert dprod == expected[2]
+
+
+def test_sparse_dimensions_must_match():
+    with pytest.raises(ValueError):
+        metrics(SparseVector(3), SparseVector(4))
+    with pytest.raises(ValueError):
+        list_mul(SparseVector(3), [0, 0, 0, 0])
+
+
+def test_csr_round_trip():
+    dense = [[0.0, 1.0, 0.0], [0.0, 0.0, 0.0], [2.0, 0.0, 3.0]]
+    matrix = CSRMatrix.from_dense(dense)
+
+    assert matrix.shape == (3, 3)
+    assert matrix.indptr.tolist() == [0, 1, 1, 3]
+    assert matrix.indices.tolist() == [1, 0, 2]
+    assert matrix.nnz == 3
+    assert matrix.to_dense() == dense
+    assert matrix.row(2).to_dense() == dense[2]
+    assert CSRMatrix.from_dense(matrix) is matrix
+
+
+@pytest.mark.parametrize('indptr, indices, data', [
+    ([0, 1], [0], [1.0]),
+    ([1, 1, 1], [0], [1.0]),
+    ([0, 1, 2], [0], [1.0]),
+    ([0, 1, 2], [0, 1], [1.0]),
+    ([0, 2, 1], [0], [1.0]),
+    ([0, 2, 2], [1, 0], [1.0, 2.0]),
+    ([0, 1, 1], [3], [1.0]),
+    ([0, 1, 1], [-1], [1.0]),
+])
+def test_csr_validation(indptr, indices, data):
+    with pytest.raises(ValueError):
+        CSRMatrix((2, 3), indptr, indices, data)
+
+
+def test_from_coo_sums_duplicates_in_any_order():
+    matrix = CSRMatrix.from_coo((2, 3), [1, 0, 1, 1, 0], [2, 1, 0, 2, 1], [1.0, 2.0, 3.0, 4.0, -2.0])
+
+    assert matrix.to_dense() == [[0.0, 0.0, 0.0], [3.0, 0.0, 5.0]]
+    # Cells which add up to zero are not stored.
+    assert matrix.nnz == 2
+    assert CSRMatrix.from_coo((2, 2), [], [], []).to_dense() == [[0.0, 0.0], [0.0, 0.0]]
+
+
+@pytest.mark.parametrize('row, col', [(2, 0), (0, 3), (-1, 0), (0, -1)])
+def test_from_coo_rejects_coordinates_outside_of_the_shape(row, col):
+    with pytest.raises(ValueError):
+        CSRMatrix.from_coo((2, 3), [0, row], [0, col], [1.0, 1.0])
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_sparse_matrix_mul_equals_dense(seed):
+    rng = random.Random(seed)
+    A = _sparse_matrix(rng, 20, 30)
+    B = _sparse_matrix(rng, 30, 10)
+
+    expected = matrix_mul(A, B)
+    assert matrix_mul(CSRMatrix.from_dense(A), B).to_dense() == expected
+    assert matrix_mul(A, CSRMatrix.from_dense(B)).to_dense() == expected
+
+
+def test_sparse_matrix_mul_dimensions_must_match():
+    with pytest.raises(ValueError):
+        matrix_mul(CSRMatrix.from_dense([[1, 2]]), CSRMatrix.from_dense([[1, 2]]))
+
+
+def _matrix_mul_reference(A, B):
+    return [[sum(map(mul, row, col)) for col in zip(*B)] for row in A]
+
+
+def _random_matrix(rng, rows, cols, value):
+    return [[value(rng) for _ in range(cols)] for _ in range(rows)]
+
+
+@pytest.mark.parametrize('threshold', [0, None, 10 ** 9])
+@pytest.mark.parametrize('value', [lambda rng: rng.randint(-100, 100), lambda rng: rng.uniform(-1, 1)])
+def test_matrix_mul_equals_sum_of_products(threshold, value):
+    rng = random.Random(0)
+    A = _random_matrix(rng, 40, TILE_SIZE + 7, value)
+    B = _random_matrix(rng, TILE_SIZE + 7, 2 * TILE_SIZE + 3, value)
+
+    assert matrix_mul(A, B, threshold=threshold) == _matrix_mul_reference(A, B)
+
+
+def test_matrix_mul_keeps_large_integers_exact():
+    A = [[2 ** 62, 3], [1, -(2 ** 40)]]
+    B = [[2 ** 10, 1], [7, 2 ** 30]]
+
+    assert matrix_mul(A, B, threshold=0) == _matrix_mul_reference(A, B)
+
+
+def test_matrix_mul_other_types():
+    A = [[Fraction(1, 3), Fraction(2, 7)]]
+    B = [[Fraction(3, 2)], [Fraction(7, 4)]]
+
+    assert matrix_mul(A, B, threshold=0) == [[Fraction(1, 1)]]
+
+
+def test_matrix_mul_inexact_floats():
+    rng = random.Random(1)
+    A = _random_matrix(rng, 50, 60, lambda rng: rng.uniform(-1, 1))
+    B = _random_matrix(rng, 60, 70, lambda rng: rng.uniform(-1, 1))
+
+    for row, expected in zip(matrix_mul(A, B, threshold=0, exact=False), _matrix_mul_reference(A, B)):
+        assert row == pytest.approx(expected, rel=1e-9, abs=1e-12)
+
+
+@pytest.mark.parametrize('A, B', [
+    ([[1, 2], [3]], [[1], [2]]),
+    ([[1, 2]], [[1, 2], [3]]),
+    ([[1, 2, 3]], [[1], [2]]),
+])
+def test_matrix_mul_validation(A, B):
+    with pytest.raises(ValueError):
+        matrix_mul(A, B)
+
+
+@pytest.mark.parametrize('chunk_bytes', [1, 1000, 64 * 1024 ** 2])
+def test_pairwise_metrics_equal_metrics(chunk_bytes):
+    rng = np.random.default_rng(0)
+    U = rng.normal(size=(23, 5))
+    V = rng.normal(size=(17, 5))
+
+    l1, l2 = pairwise_metrics(U.tolist(), V, chunk_bytes=chunk_bytes)
+
+    assert l1.shape == l2.shape == (23, 17)
+    for i, u in enumerate(U.tolist()):
+        for j, v in enumerate(V.tolist()):
+            assert (l1[i, j], l2[i, j]) == pytest.approx(metrics(u, v), rel=1e-12)
+
+
+@pytest.mark.parametrize('metric', ['l1', 'l2'])
+def test_knn_equals_full_sort(metric):
+    rng = np.random.default_rng(1)
+    corpus = rng.normal(size=(200, 8))
+    queries = rng.normal(size=(10, 8))
+    distances = pairwise_metrics(queries, corpus)[0 if metric == 'l1' else 1]
+
+    nearest, nearest_distances = knn(queries, corpus, 7, metric=metric, chunk_bytes=4096)
+
+    np.testing.assert_array_equal(nearest, np.argsort(distances, axis=1, kind='stable')[:, :7])
+    np.testing.assert_allclose(nearest_distances, np.sort(distances, axis=1)[:, :7], rtol=1e-12)
+
+    single, single_distances = knn(queries[0], corpus, 7, metric=metric)
+    np.testing.assert_array_equal(single, nearest[0])
+    np.testing.assert_allclose(single_distances, nearest_distances[0], rtol=1e-12)
+
+
+def test_knn_whole_corpus():
+    corpus = [[3.0], [1.0], [2.0]]
+
+    nearest, distances = knn([0.0], corpus, 10)
+
+    assert nearest.tolist() == [1, 2, 0]
+    assert distances.tolist() == [1.0, 2.0, 3.0]
+
+
+def test_pairwise_validation():
+    with pytest.raises(ValueError):
+        pairwise_metrics([[1.0, 2.0]], [[1.0, 2.0, 3.0]])
+    with pytest.raises(ValueError):
+        knn([1.0, 2.0], [[1.0, 2.0]], 1, metric='cosine')
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_vector_kernels_equal_lists(seed):
+    rng = random.Random(seed)
+    u = [rng.uniform(-1e3, 1e3) for _ in range(1000)]
+    v = [rng.uniform(-1, 1) for _ in range(1000)]
+
+    assert metrics(Vector(u), Vector(v)) == metrics(u, v)
+    assert metrics(Vector(u), v) == metrics(u, v)
+
+    vsum, vprod, dprod = list_mul(Vector(u), v)
+    expected = list_mul(u, v)
+    assert isinstance(vsum, Vector) and isinstance(vprod, Vector)
+    assert (vsum.tolist(), vprod.tolist(), dprod) == expected
+
+
+def test_vector_dimensions_must_match():
+    with pytest.raises(ValueError):
+        metrics(Vector([1.0, 2.0]), [1.0])
+    with pytest.raises(ValueError):
+        list_mul([1.0], Vector([1.0, 2.0]))
+
+
+def test_vector_shares_buffers():
+    values = np.arange(5, dtype=float)
+    vector = Vector.from_buffer(values)
+
+    values[0] = 42.0
+    assert vector[0] == 42.0
+    assert np.shares_memory(np.asarray(vector), values)
+    assert np.asarray(vector.memoryview()).tolist() == [42.0, 1.0, 2.0, 3.0, 4.0]
+    assert np.asarray(vector, dtype=np.float32).dtype == np.float32
+
+    for buffer in (np.arange(5), np.arange(10, dtype=float)[::2], np.zeros((2, 2)), array('f', [1.0])):
+        with pytest.raises(TypeError):
+            Vector.from_buffer(buffer)
+
+
+def test_vector_sequence_behaviour():
+    vector = Vector([1, 2, 3])
+
+    assert len(vector) == 3 and list(vector) == [1.0, 2.0, 3.0] and vector[-1] == 3.0
+    assert vector == [1.0, 2.0, 3.0] and vector == Vector([1, 2, 3])
+    assert vector != [1.0, 2.0] and vector != [1.0, 2.0, 4.0]
+    assert vector != 3 and vector != object()
+    assert repr(vector) == 'Vector([1.0, 2.0, 3.0])'
+    assert gradient(2, 3, Vector([1.5, -1.0])) == gradient(2, 3, (1.5, -1.0))
+
+
+@pytest.mark.parametrize('workers', [1, 3, 8])
+def test_parallel_matrix_mul_equals_matrix_mul(workers):
+    rng = random.Random(workers)
+    A = _random_matrix(rng, 13, 9, lambda rng: rng.uniform(-1, 1))
+    B = _random_matrix(rng, 9, 6, lambda rng: rng.uniform(-1, 1))
+
+    assert parallel_matrix_mul(A, B, workers=workers) == _matrix_mul_reference(A, B)
+
+
+def test_parallel_matrix_mul_returns_floats():
+    assert parallel_matrix_mul([[1, 2], [3, 4]], [[5], [6]], workers=2) == [[17.0], [39.0]]
+    assert parallel_matrix_mul([[1, 2]], [[], []], workers=2) == [[]]
+
+
+def test_parallel_matrix_mul_validation():
+    with pytest.raises(ValueError):
+        parallel_matrix_mul([[1, 2], [3]], [[1], [2]], workers=2)
+    with pytest.raises(ValueError):
+        parallel_matrix_mul([[1, 2, 3]], [[1], [2]], workers=2)
+
+
+def test_gradient_batch_equals_gradient():
+    rng = np.random.default_rng(2)
+    points = rng.normal(size=(50, 2))
+    w1 = rng.normal(size=50)
+    w2 = rng.normal(size=50)
+
+    batch = gradient_batch(w1, w2, points)
+
+    assert batch.shape == (50, 2)
+    for (x1, x2), a, b, gradients in zip(points.tolist(), w1.tolist(), w2.tolist(), batch.tolist()):
+        assert tuple(gradients) == gradient(a, b, (x1, x2))
+    np.testing.assert_array_equal(gradient_batch(3, 4, points), [gradient(3, 4, point) for point in points.tolist()])
+
+
+def test_gradient_batch_grid():
+    points = [[1.0, 5.0], [2.0, 6.0], [3.0, 7.0]]
+
+    grid = gradient_batch([[1.0], [2.0]], [[10.0], [20.0]], points)
+
+    assert grid.shape == (2, 3, 2)
+    assert grid[1, 2].tolist() == list(gradient(2.0, 20.0, points[2]))
+
+
+@pytest.mark.parametrize('points', [[[1.0, 2.0, 3.0]], [[1.0]], 1.0])
+def test_gradient_batch_validation(points):
+    with pytest.raises(ValueError):
+        gradient_batch(1, 1, points)
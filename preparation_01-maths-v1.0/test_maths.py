@@ -0,0 +1,76 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from maths import FACTORIAL_TABLE_SIZE, combination, combinations, derivative, derivative_batch, fact, pascal_row
+
+
+@pytest.mark.parametrize('x', [0, 1, 2, 10, 170, FACTORIAL_TABLE_SIZE - 1, FACTORIAL_TABLE_SIZE, 3000])
+def test_fact(x):
+    assert fact(x) == math.factorial(x)
+
+
+def test_fact_in_any_order():
+    for x in random.Random(0).sample(range(2 * FACTORIAL_TABLE_SIZE), 50):
+        assert fact(x) == math.factorial(x)
+
+
+def test_fact_negative():
+    with pytest.raises(ValueError):
+        fact(-1)
+
+
+def test_combination_is_exact():
+    rng = random.Random(1)
+    for _ in range(200):
+        n = rng.randint(0, 2000)
+        r = rng.randint(0, n)
+        assert combination(n, r) == math.comb(n, r)
+    assert combination(10 ** 6, 3) == math.comb(10 ** 6, 3)
+
+
+@pytest.mark.parametrize('n, r', [(-1, 0), (3, -1), (3, 4)])
+def test_combination_validation(n, r):
+    with pytest.raises(ValueError):
+        combination(n, r)
+
+
+@pytest.mark.parametrize('n', [0, 1, 2, 5, 10, 101])
+def test_pascal_row(n):
+    assert pascal_row(n) == [math.comb(n, r) for r in range(n + 1)]
+
+
+def test_pascal_row_negative():
+    with pytest.raises(ValueError):
+        pascal_row(-1)
+
+
+def test_combinations():
+    rng = random.Random(2)
+    pairs = [(n, rng.randint(0, n)) for n in (rng.randint(0, 300) for _ in range(300))]
+
+    assert combinations(pairs) == [math.comb(n, r) for n, r in pairs]
+    assert combinations(iter([(5, 0), (5, 5), (5, 2), (0, 0)])) == [1, 1, 10, 1]
+    assert combinations([]) == []
+
+
+@pytest.mark.parametrize('pairs', [[(5, 2), (-1, 0)], [(5, 2), (3, 4)], [(5, -1)]])
+def test_combinations_validation(pairs):
+    with pytest.raises(ValueError):
+        combinations(pairs)
+
+
+def test_derivative_batch_equals_derivative():
+    rng = np.random.default_rng(0)
+    w1 = rng.normal(size=(4, 1))
+    w2 = rng.normal(size=(4, 1))
+    x = rng.normal(size=30)
+
+    batch = derivative_batch(w1, w2, x)
+
+    assert batch.shape == (4, 30)
+    for (i, j), value in np.ndenumerate(batch):
+        assert value == derivative(float(w1[i, 0]), float(w2[i, 0]), float(x[j]))
+    assert derivative_batch(1, 2, [0, 1, -2]).tolist() == [2.0, 5.0, 14.0]
@@ -0,0 +1,136 @@
+import math
+import random
+
+import numpy as np
+import pytest
+from scipy.stats import binom
+
+from probabilities import (DIRECT_SUM_MAX_TRIALS, Binomial, bin_cdf, bin_cdf_array, bin_dist, bin_dist_array, binomial,
+                           head_tails, head_tails_array, log_head_tails)
+
+
+def test_bin_cdf_sums_bin_dist():
+    rng = random.Random(0)
+    for _ in range(300):
+        n = rng.randint(1, DIRECT_SUM_MAX_TRIALS)
+        p = rng.random()
+        x = rng.randint(0, n - 1)
+        assert bin_cdf(n, p, x) == sum([bin_dist(n, p, cum) for cum in range(x + 1)])
+    assert bin_cdf(10, 0.3, 10) == 1.0
+
+
+def test_bin_cdf_large_n():
+    for n, p, x in [(5000, 0.5, 2500), (100_000, 0.01, 950), (DIRECT_SUM_MAX_TRIALS + 1, 0.2, 0)]:
+        assert bin_cdf(n, p, x) == pytest.approx(binom.cdf(x, n, p), rel=1e-9)
+    assert bin_cdf(5000, 0.5, -1) == 0.0
+
+
+def test_bin_cdf_validation():
+    with pytest.raises(ValueError):
+        bin_cdf(5, 0.5, 6)
+
+
+@pytest.mark.parametrize('n, p', [(0, 0.5), (1, 0.3), (20, 0.5), (500, 0.01), (DIRECT_SUM_MAX_TRIALS, 0.7)])
+def test_binomial_matches_bin_dist(n, p):
+    distribution = Binomial(n, p)
+
+    for x in range(n + 1):
+        assert distribution.pmf(x) == bin_dist(n, p, x)
+    for x in range(n):
+        assert distribution.cdf(x) == pytest.approx(bin_cdf(n, p, x), rel=1e-12, abs=1e-300)
+    assert distribution.cdf(n) == 1.0
+
+
+@pytest.mark.parametrize('n, p', [(DIRECT_SUM_MAX_TRIALS + 1, 0.5), (20_000, 0.3), (200_000, 0.001)])
+def test_binomial_log_space(n, p):
+    distribution = Binomial(n, p)
+    rng = random.Random(n)
+
+    for x in [0, n // 2, int(n * p), n - 1] + [rng.randint(0, n) for _ in range(20)]:
+        assert distribution.pmf(x) == pytest.approx(binom.pmf(x, n, p), rel=1e-8, abs=1e-300)
+        assert distribution.cdf(x) == pytest.approx(binom.cdf(x, n, p), rel=1e-8, abs=1e-300)
+        assert distribution.sf(x) == pytest.approx(binom.sf(x, n, p), rel=1e-8, abs=1e-300)
+
+
+def test_binomial_tails_and_quantile():
+    distribution = Binomial(200, 0.25)
+
+    assert distribution.pmf(-1) == 0.0 and distribution.cdf(-1) == 0.0 and distribution.sf(-1) == 1.0
+    assert distribution.sf(200) == 0.0
+    # The upper tail is summed directly, so it keeps its precision far below 1 - cdf.
+    assert distribution.sf(150) == pytest.approx(binom.sf(150, 200, 0.25), rel=1e-9)
+    for q in (0.01, 0.5, 0.99, 1.0):
+        assert distribution.quantile(q) == binom.ppf(q, 200, 0.25)
+    assert distribution.quantile(0.0) == 0
+
+
+@pytest.mark.parametrize('p', [0, 1])
+def test_binomial_degenerate(p):
+    distribution = Binomial(10, p)
+    certain = 10 * p
+
+    assert distribution.pmf(certain) == 1.0
+    assert sum(distribution.pmf(x) for x in range(11)) == 1.0
+    assert distribution.cdf(certain) == 1.0
+    assert distribution.quantile(0.5) == certain
+
+
+def test_binomial_validation():
+    with pytest.raises(ValueError):
+        Binomial(-1, 0.5)
+    with pytest.raises(ValueError):
+        Binomial(10, 1.5)
+    with pytest.raises(ValueError):
+        Binomial(10, 0.5).pmf(11)
+    with pytest.raises(ValueError):
+        Binomial(10, 0.5).quantile(2)
+
+
+def test_binomial_is_shared():
+    assert binomial(50, 0.5) is binomial(50, 0.5)
+    assert binomial(50, 0.5) is not binomial(50, 0.25)
+
+
+def test_head_tails_array():
+    p = np.array([[0.0], [0.3], [0.5], [1.0]])
+    n = np.array([0, 1, 7, 40])
+
+    expected = [[head_tails(float(pi), int(ni)) for ni in n] for pi in p[:, 0]]
+    np.testing.assert_allclose(head_tails_array(p, n), expected, rtol=1e-15)
+    with np.errstate(divide='ignore'):
+        np.testing.assert_allclose(log_head_tails(p, n), np.log(expected), rtol=1e-14)
+    # 0.5 ** 2000 underflows, its logarithm does not.
+    assert log_head_tails(0.5, 2000) == pytest.approx(2000 * math.log(0.5))
+    assert log_head_tails(0.0, 0) == 0.0
+
+
+def test_bin_dist_and_cdf_arrays():
+    n = np.array([1, 10, 50, 200])[:, None, None]
+    p = np.array([0.01, 0.5, 0.9])[None, :, None]
+    x = np.array([0, 1, 5, 10])[None, None, :]
+
+    pmf = bin_dist_array(n, p, x, masked=True)
+    cdf = bin_cdf_array(n, p, x, masked=True)
+
+    assert pmf.shape == cdf.shape == (4, 3, 4)
+    for (i, j, k), masked in np.ndenumerate(np.ma.getmaskarray(pmf)):
+        ni, pj, xk = int(n[i, 0, 0]), float(p[0, j, 0]), int(x[0, 0, k])
+        assert masked == (xk > ni) == np.ma.getmaskarray(cdf)[i, j, k]
+        if not masked:
+            assert pmf[i, j, k] == pytest.approx(bin_dist(ni, pj, xk), rel=1e-10, abs=1e-300)
+            assert cdf[i, j, k] == pytest.approx(bin_cdf(ni, pj, xk), rel=1e-10, abs=1e-300)
+
+
+def test_arrays_for_large_n():
+    # The coefficients of bin_dist overflow here, the log-space terms do not.
+    assert bin_dist_array(100_000, 0.5, 50_000) == pytest.approx(binom.pmf(50_000, 100_000, 0.5), rel=1e-9)
+    assert bin_cdf_array(100_000, 0.5, 50_000) == pytest.approx(binom.cdf(50_000, 100_000, 0.5), rel=1e-9)
+    np.testing.assert_array_equal(bin_dist_array(10, 0.5, [-1, 0]) == 0.0, [True, False])
+    np.testing.assert_array_equal(bin_cdf_array(10, 0.5, [-1, 10]), [0.0, 1.0])
+
+
+def test_arrays_validation():
+    with pytest.raises(ValueError):
+        bin_dist_array([5, 10], 0.5, [6, 1])
+    with pytest.raises(ValueError):
+        bin_cdf_array(5, [0.1, 0.2], 6)
@@ -0,0 +1,174 @@
+import random
+from math import sqrt
+
+import numpy as np
+import pytest
+
+from statistics import (MAD_SCALE, RunningStats, calculate_mad, calculate_mean, calculate_median,
+                        calculate_standard_deviation, filter_outliers, remove_outliers)
+
+
+def _data(count, seed=0):
+    rng = random.Random(seed)
+    return [rng.gauss(10, 3) for _ in range(count)]
+
+
+def test_running_stats_equals_two_pass():
+    data = _data(1000)
+    stats = RunningStats(iter(data))
+
+    assert stats.count == 1000
+    assert stats.mean == pytest.approx(calculate_mean(data), rel=1e-12)
+    assert stats.std == pytest.approx(calculate_standard_deviation(data), rel=1e-12)
+    assert stats.variance == pytest.approx(calculate_standard_deviation(data) ** 2, rel=1e-12)
+
+
+def test_running_stats_merge():
+    data = _data(1001, seed=1)
+    chunks = [RunningStats(data[start:start + 100]) for start in range(0, len(data), 100)]
+
+    merged = RunningStats()
+    for chunk in chunks:
+        merged = merged + chunk
+
+    assert merged.count == len(data)
+    assert merged.mean == pytest.approx(calculate_mean(data), rel=1e-12)
+    assert merged.std == pytest.approx(calculate_standard_deviation(data), rel=1e-12)
+    assert (RunningStats([1, 2]) + RunningStats([3, 4])).mean == 2.5
+    assert RunningStats().merge(RunningStats()).count == 0
+
+
+def test_running_stats_keeps_precision_with_a_large_offset():
+    data = [1e9 + val for val in (4, 7, 13, 16)]
+
+    assert RunningStats(data).variance == pytest.approx(22.5, rel=1e-9)
+
+
+def test_running_stats_empty():
+    stats = RunningStats().extend([])
+    with pytest.raises(ValueError):
+        stats.mean
+    with pytest.raises(ValueError):
+        stats.std
+
+
+def test_mean_and_std_of_generators():
+    data = _data(500, seed=2)
+
+    assert calculate_mean(val for val in data) == pytest.approx(calculate_mean(data), rel=1e-12)
+    assert calculate_standard_deviation(val for val in data) == pytest.approx(
+        calculate_standard_deviation(data), rel=1e-12)
+    with pytest.raises(ValueError):
+        calculate_mean(val for val in [])
+
+
+def _with_outliers(count, seed=0):
+    data = _data(count, seed)
+    for i in range(0, count, 37):
+        data[i] *= 5
+    return data
+
+
+def _rolling_scan(data, window):
+    # Recompute the statistics of the trailing window for every point.
+    kept = []
+    for i, val in enumerate(data):
+        trailing = data[max(0, i - window):i]
+        if len(trailing) < 2:
+            kept.append(val)
+            continue
+        xbar = sum(trailing) / len(trailing)
+        two_std = 2 * sqrt(sum((x - xbar) ** 2 for x in trailing) / len(trailing))
+        if xbar - two_std <= val <= xbar + two_std:
+            kept.append(val)
+    return kept
+
+
+def test_filter_outliers_equals_remove_outliers():
+    data = _with_outliers(2000)
+
+    assert list(filter_outliers(data)) == remove_outliers(data)
+    assert list(filter_outliers(range(100))) == remove_outliers(list(range(100)))
+    assert list(filter_outliers([3.5])) == [3.5]
+
+
+@pytest.mark.parametrize('window', [2, 10, 100, 5000])
+def test_filter_outliers_rolling(window):
+    data = _with_outliers(3000, seed=window)
+
+    assert list(filter_outliers(iter(data), window=window)) == _rolling_scan(data, window)
+
+
+def test_filter_outliers_validation():
+    with pytest.raises(TypeError):
+        list(filter_outliers(iter([1, 2, 3])))
+    with pytest.raises(ValueError):
+        list(filter_outliers([]))
+    with pytest.raises(ValueError):
+        filter_outliers([1, 2, 3], window=1)
+
+
+def _sorted_median(data):
+    values = sorted(data)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+
+@pytest.mark.parametrize('count', [1, 2, 3, 10, 101, 1000])
+def test_calculate_median(count):
+    rng = random.Random(count)
+    for data in (_data(count, seed=count), [rng.randint(0, 5) for _ in range(count)]):
+        copy = list(data)
+        assert calculate_median(data) == _sorted_median(data)
+        assert calculate_median(np.array(data)) == _sorted_median(data)
+        assert data == copy
+
+
+def test_calculate_mad():
+    data = _data(501, seed=3)
+    med = _sorted_median(data)
+
+    assert calculate_mad(data) == _sorted_median([abs(val - med) for val in data])
+    assert calculate_mad(np.array(data)) == calculate_mad(data)
+    assert calculate_mad(data, med=0.0) == _sorted_median([abs(val) for val in data])
+    with pytest.raises(ValueError):
+        calculate_median([])
+
+
+def test_remove_outliers_mad():
+    data = _with_outliers(1000, seed=4)
+    copy = list(data)
+    med = _sorted_median(data)
+    limit = 2 * MAD_SCALE * calculate_mad(data)
+
+    kept = remove_outliers(data, method='mad')
+
+    assert kept == [val for val in data if abs(val - med) < limit]
+    assert data == copy
+    array = np.array(data)
+    np.testing.assert_array_equal(remove_outliers(array, method='mad'), kept)
+    np.testing.assert_array_equal(array, copy)
+
+
+def test_remove_outliers_mad_with_mostly_equal_points():
+    # The MAD is 0, so the mean absolute deviation decides.
+    data = [5.0] * 7 + [5.1, 4.9, 50.0]
+
+    assert remove_outliers(data, method='mad') == [5.0] * 7 + [5.1, 4.9]
+    np.testing.assert_array_equal(remove_outliers(np.array(data), method='mad'), [5.0] * 7 + [5.1, 4.9])
+
+    equal = [2.0] * 5
+    kept = remove_outliers(equal, method='mad')
+    assert kept == equal and kept is not equal
+
+
+def test_remove_outliers_std():
+    data = _with_outliers(1000, seed=5)
+    xbar = calculate_mean(data)
+    two_std = 2 * calculate_standard_deviation(data)
+
+    assert remove_outliers(data) == [val for val in data if xbar - two_std < val < xbar + two_std]
+    with pytest.raises(ValueError):
+        remove_outliers(data, method='iqr')
+    with pytest.raises(ValueError):
+        remove_outliers([], method='mad')
@@ -0,0 +1,118 @@
+"""
+Benchmarks for the programming preparation modules.
+
+    python benchmark.py clients [--records 10000000] [--workers 1 2 4] [--eager]
+
+Writes a JSON-lines file of synthetic client records, then measures the
+throughput and peak memory of iter_clients streaming it in this process and
+on pools of worker processes. With --eager, also measures the original
+approach of loading every record before calling process_clients (this needs
+several GiB of memory at 10M records).
+
+Each case runs in a fresh process, so its peak resident memory (and that of
+its workers) is not inflated by the cases before it.
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from customers import CLIENTS_EXAMPLE, iter_clients, process_clients, read_jsonl
+
+
+def write_clients(path, records, seed=0):
+    """
+    Write a JSON-lines file of client records shaped like CLIENTS_EXAMPLE,
+    with random fields missing.
+
+    :param path: path of the file
+    :param records: number of records
+    :param seed: random seed
+    """
+
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as output:
+        for i in range(records):
+            client = dict(CLIENTS_EXAMPLE[i % len(CLIENTS_EXAMPLE)])
+            for field in ('title', 'middle-name', 'address'):
+                if rng.random() < 0.3:
+                    client.pop(field, None)
+            client['first-name'] = f'{client["first-name"]}{i}'
+            output.write(json.dumps(client) + '\n')
+
+
+def _run_case(path, mode, workers):
+    start = time.perf_counter()
+    if mode == 'eager':
+        count = len(process_clients(list(read_jsonl(path))))
+    else:
+        count = sum(1 for _ in iter_clients(path, workers=workers))
+    seconds = time.perf_counter() - start
+
+    # ru_maxrss is in KiB on Linux.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    workers_peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024
+
+    return count, seconds, peak, workers_peak
+
+
+def bench_clients(records, workers, eager=False):
+    """
+    Measure the throughput and peak memory of the client processing on a
+    file of synthetic records.
+
+    :param records: number of records
+    :param workers: numbers of worker processes to try
+    :param eager: also measure loading every record before process_clients
+    :return: {case: (records per second, peak bytes, peak bytes of a worker)}
+    :rtype: dict
+    """
+
+    cases = [('iter_clients, streaming', 'stream', None)]
+    cases += [(f'iter_clients, {count} worker(s)', 'stream', count) for count in workers]
+    if eager:
+        cases.insert(0, ('load all + process_clients', 'eager', None))
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'clients.jsonl')
+        write_clients(path, records)
+        print(f'{records} records, {os.path.getsize(path) / 1024 ** 2:.0f} MiB of JSON lines', flush=True)
+
+        expected = None
+        for name, mode, count in cases:
+            with ProcessPoolExecutor(max_workers=1) as runner:
+                kept, seconds, peak, workers_peak = runner.submit(_run_case, path, mode, count).result()
+            expected = expected if expected is not None else kept
+            assert kept == expected
+            results[name] = (records / seconds, peak, workers_peak)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    clients = commands.add_parser('clients', help='measure the streaming client processing')
+    clients.add_argument('--records', type=int, default=10_000_000)
+    clients.add_argument('--workers', type=int, nargs='+',
+                         default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    clients.add_argument('--eager', action='store_true')
+
+    args = parser.parse_args()
+
+    if args.command == 'clients':
+        results = bench_clients(args.records, args.workers, args.eager)
+        for name, (throughput, peak, workers_peak) in results.items():
+            print(f'{name:<32} {throughput:12,.0f} records/s  peak {peak / 1024 ** 2:8.1f} MiB'
+                  f'  worker peak {workers_peak / 1024 ** 2:8.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
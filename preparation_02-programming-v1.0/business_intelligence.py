@@ -1,5 +1,14 @@
 from math import ceil
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Upper bound on the size (in bytes) of each block of results computed by
+# write_break_even_grid.
+GRID_CHUNK_BYTES = 64 * 1024 ** 2
+
 
 def minimum_profitable_volume(sell_price, fixed_cost, cost_per_unit):
     """
@@ -36,3 +45,87 @@ def minimum_profitable_volume(sell_price, fixed_cost, cost_per_unit):
     profit_per_unit = sell_price - cost_per_unit
 
     return ceil(fixed_cost/profit_per_unit)
+
+
+def minimum_profitable_volumes(sell_price, fixed_cost, cost_per_unit, grid=False):
+    """
+    Vectorised version of minimum_profitable_volume, for sensitivity
+    sweeps over many price and cost scenarios.
+
+    By default, the three arguments are arrays (or scalars) broadcast
+    together, giving one scenario per element. With grid=True, they are
+    1-D arrays and every combination of them is evaluated: the result has
+    shape (len(sell_price), len(fixed_cost), len(cost_per_unit)).
+
+    The scenarios where sell_price <= cost_per_unit, for which
+    minimum_profitable_volume returns None, are masked.
+
+    E.g., minimum_profitable_volumes([1020, 1019, 20], 1000, 20) is
+    [1.0, 2.0, --]
+
+    :param sell_price: price(s) each unit is sold at
+    :param fixed_cost: fixed cost(s)
+    :param cost_per_unit: cost(s) of manufacturing each unit
+    :param grid: evaluate every combination of the three arguments
+    :return: number of units that need to be made and sold, per scenario
+    :rtype: np.ma.MaskedArray
+    """
+
+    if np is None:
+        raise ImportError("minimum_profitable_volumes requires NumPy")
+
+    sell_price = np.asarray(sell_price, dtype=float)
+    fixed_cost = np.asarray(fixed_cost, dtype=float)
+    cost_per_unit = np.asarray(cost_per_unit, dtype=float)
+
+    if grid:
+        sell_price = sell_price[:, None, None]
+        fixed_cost = fixed_cost[None, :, None]
+        cost_per_unit = cost_per_unit[None, None, :]
+
+    profit_per_unit = sell_price - cost_per_unit
+    unprofitable = profit_per_unit <= 0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volume = np.ceil(fixed_cost / profit_per_unit)
+
+    return np.ma.masked_array(volume, np.broadcast_to(unprofitable, volume.shape))
+
+
+def write_break_even_grid(path, sell_prices, fixed_costs, costs_per_unit, chunk_bytes=GRID_CHUNK_BYTES):
+    """
+    Evaluate minimum_profitable_volumes(..., grid=True) and stream the
+    result to a .npy file, a block of sell prices at a time, for grids
+    too big to hold in memory. The file can be opened again with
+    np.load(path, mmap_mode='r').
+
+    Unprofitable scenarios are stored as NaN.
+
+    :param path: path of the .npy file to write
+    :param sell_prices: prices each unit could be sold at (1-D)
+    :param fixed_costs: fixed costs (1-D)
+    :param costs_per_unit: costs of manufacturing each unit (1-D)
+    :param chunk_bytes: memory bound of each block of results
+    :return: shape of the grid written
+    :rtype: tuple
+    """
+
+    if np is None:
+        raise ImportError("write_break_even_grid requires NumPy")
+
+    sell_prices = np.asarray(sell_prices, dtype=float)
+    fixed_costs = np.asarray(fixed_costs, dtype=float)
+    costs_per_unit = np.asarray(costs_per_unit, dtype=float)
+
+    shape = (len(sell_prices), len(fixed_costs), len(costs_per_unit))
+    output = np.lib.format.open_memmap(path, mode='w+', dtype=float, shape=shape)
+    step = max(1, chunk_bytes // max(1, 8 * shape[1] * shape[2]))
+
+    for start in range(0, shape[0], step):
+        block = minimum_profitable_volumes(sell_prices[start:start + step], fixed_costs, costs_per_unit, grid=True)
+        output[start:start + step] = block.filled(np.nan)
+
+    output.flush()
+    del output
+
+    return shape
@@ -1,4 +1,19 @@
-from collections import defaultdict
+import hashlib
+import json
+import mmap
+import os
+import struct
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+# Layout of the files written by HouseholdIndex.save().
+_MAGIC = b'HHIX'
+_VERSION = 1
+# Magic, format version, number of slots, number of households.
+_HEADER = struct.Struct('<4sH2xQQ')
+# Address hash, offset and length of the JSON entry in the blob.
+_SLOT = struct.Struct('<QQI')
 
 CLIENTS_EXAMPLE = [
     {
@@ -64,14 +79,355 @@ def process_clients(segment):
     :rtype: list of tuples
     """
 
-    marketing_list = []
+    return list(iter_clients(segment))
+
+
+def iter_clients(segment, workers=None, chunk_size=10000):
+    """
+    Generator version of process_clients, for segments too big to hold in
+    memory.
+
+    The segment can be any iterable of client records (read lazily) or
+    the path of a JSON-lines file with one record per line. The name
+    parts and address are read from each record directly, without
+    copying it.
+
+    With workers, the records are processed in chunks of chunk_size on a
+    pool of worker processes (JSON lines are sent unparsed and decoded by
+    the workers). The tuples are still yielded in the order of the
+    segment, and only a few chunks per worker are in flight at a time, so
+    memory stays bounded.
+
+    :param segment: iterable of client records, or path of a JSON-lines file
+    :param workers: number of worker processes (None to process the
+    records in this process)
+    :param chunk_size: number of records sent to a worker at a time
+    :return: tuples of full name and mailing address
+    :rtype: iterator of tuples
+    """
+
+    raw = isinstance(segment, (str, os.PathLike))
+    if raw:
+        records = _jsonl_lines(segment)
+    else:
+        records = iter(segment)
+
+    if not workers:
+        if raw:
+            records = map(json.loads, records)
+        for client in records:
+            entry = _marketing_entry(client)
+            if entry:
+                yield entry
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if chunk:
+                pending.append(executor.submit(_process_chunk, chunk, raw))
+            if pending and (not chunk or len(pending) >= 2 * workers):
+                yield from pending.popleft().result()
+            if not chunk and not pending:
+                return
+
+
+def read_jsonl(path):
+    """
+    Lazily read client records from a JSON-lines file
+
+    :param path: path of the file
+    :return: client records
+    :rtype: iterator of dicts
+    """
+
+    return map(json.loads, _jsonl_lines(path))
+
+
+def _jsonl_lines(path):
+    with open(path, encoding='utf-8') as lines:
+        for line in lines:
+            if line.strip():
+                yield line
+
+
+def _process_chunk(chunk, raw):
+    if raw:
+        chunk = map(json.loads, chunk)
+
+    return [entry for entry in map(_marketing_entry, chunk) if entry]
+
+
+def _marketing_entry(client):
+    """Return the (full name, address) tuple of a client record, or None if it has no address."""
+
+    address = client.get('address')
+    if not address:
+        return None
+
+    name = ' '.join(
+        filter(None, (client.get('title'), client.get('first-name'), client.get('middle-name'),
+                      client.get('last-name'))))
+
+    return name, address
+
+
+def normalise_address(address):
+    """
+    Normalise a mailing address for comparison: case-folded, commas
+    dropped and whitespace collapsed.
+
+    E.g., normalise_address('33  Castle Street,London') is '33 castle street london'
+
+    :param address: mailing address
+    :return: normalised address
+    :rtype: str
+    """
+
+    return ' '.join(address.casefold().replace(',', ' ').split())
+
+
+class HouseholdIndex:
+    """
+    Index of the clients of a segment by normalised mailing address, so
+    that the clients of a household are found in O(1) instead of scanning
+    the output of process_clients.
+
+    The index is built in one pass over the segment (anything accepted by
+    iter_clients), and kept up to date with add() and remove() as records
+    change. save() writes it to a compact file which MappedHouseholdIndex
+    memory-maps, so a campaign can reuse it without rebuilding it.
+
+    E.g., HouseholdIndex(CLIENTS_EXAMPLE)['33 castle street, LONDON'] is
+    [('Princess Elsa Frost', '33 Castle Street, London')]
+
+    :param segment: optional client records, or path of a JSON-lines file
+    """
+
+    def __init__(self, segment=()):
+        self._households = {}
+        for entry in iter_clients(segment):
+            self._households.setdefault(normalise_address(entry[1]), []).append(entry)
+
+    def add(self, client):
+        """
+        Add a client record to its household.
+
+        :param client: client record
+        :return: normalised address of the household, or None if the client
+        has no address (and was not added)
+        :rtype: str
+        """
+
+        entry = _marketing_entry(client)
+        if not entry:
+            return None
+
+        key = normalise_address(entry[1])
+        self._households.setdefault(key, []).append(entry)
+
+        return key
+
+    def remove(self, client):
+        """
+        Remove a client record (as it was added) from its household. The
+        household is dropped with its last client.
+
+        :param client: client record
+        :raise KeyError: if the client is not in the index
+        """
+
+        entry = _marketing_entry(client)
+        key = normalise_address(entry[1]) if entry else None
+        household = self._households.get(key, [])
+        if entry not in household:
+            raise KeyError(f"Client not in the index: {client!r}")
+
+        household.remove(entry)
+        if not household:
+            del self._households[key]
+
+    def get(self, address, default=None):
+        """
+        Return the clients living at an address.
+
+        :param address: mailing address (normalised or not)
+        :param default: value returned if nobody lives there
+        :return: tuples of full name and mailing address
+        :rtype: list of tuples
+        """
+
+        household = self._households.get(normalise_address(address))
+        return list(household) if household else default
+
+    def __getitem__(self, address):
+        household = self.get(address)
+        if household is None:
+            raise KeyError(address)
+        return household
+
+    def __contains__(self, address):
+        return normalise_address(address) in self._households
+
+    def __len__(self):
+        return len(self._households)
+
+    def __iter__(self):
+        return iter(self._households)
+
+    def households(self, min_size=1):
+        """
+        Return the households with at least min_size clients.
+
+        :param min_size: minimum number of clients (2 for shared addresses)
+        :return: (normalised address, clients) pairs
+        :rtype: iterator of tuples
+        """
+
+        return ((key, list(household)) for key, household in self._households.items()
+                if len(household) >= min_size)
+
+    def save(self, path):
+        """
+        Write the index to a file that MappedHouseholdIndex can memory-map.
+
+        The file holds a header, an open-addressing hash table (linear
+        probing, at most half full) of fixed-size slots, and the
+        households as a blob of JSON entries. Each slot stores the 8-byte
+        BLAKE2b hash of a normalised address with the offset and length of
+        its JSON entry (hash 0 marks an empty slot).
+
+        :param path: path of the file
+        """
+
+        slots = 1
+        while slots < 2 * len(self._households):
+            slots *= 2
+
+        table = bytearray(slots * _SLOT.size)
+        blob = bytearray()
+        for key, household in self._households.items():
+            data = json.dumps([key, household], ensure_ascii=False).encode('utf-8')
+            slot = _address_hash(key) % slots
+            while _SLOT.unpack_from(table, slot * _SLOT.size)[0]:
+                slot = (slot + 1) % slots
+            _SLOT.pack_into(table, slot * _SLOT.size, _address_hash(key), len(blob), len(data))
+            blob += data
+
+        with open(path, 'wb') as output:
+            output.write(_HEADER.pack(_MAGIC, _VERSION, slots, len(self._households)))
+            output.write(table)
+            output.write(blob)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read an index written by save() back into memory, e.g. to update it.
+
+        :param path: path of the file
+        :return: index
+        :rtype: HouseholdIndex
+        """
+
+        index = cls()
+        with MappedHouseholdIndex(path) as mapped:
+            index._households = dict(mapped.households())
+
+        return index
+
+
+class MappedHouseholdIndex:
+    """
+    Read-only, memory-mapped view of a file written by HouseholdIndex.save().
+
+    Looking up an address hashes it, probes the table in place and decodes
+    only the JSON entry of that household, so opening the file costs
+    nothing whatever its size.
+
+    :param path: path of the file
+    :raise ValueError: if the file is not a household index
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as source:
+            self._map = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self._slots, self._count = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC or version != _VERSION:
+            self._map.close()
+            raise ValueError(f"Not a household index (version {_VERSION}): {path}")
+        self._blob = _HEADER.size + self._slots * _SLOT.size
+
+    def get(self, address, default=None):
+        """
+        Return the clients living at an address.
+
+        :param address: mailing address (normalised or not)
+        :param default: value returned if nobody lives there
+        :return: tuples of full name and mailing address
+        :rtype: list of tuples
+        """
+
+        key = normalise_address(address)
+        address_hash = _address_hash(key)
+        slot = address_hash % self._slots
+        while True:
+            slot_hash, offset, length = _SLOT.unpack_from(self._map, _HEADER.size + slot * _SLOT.size)
+            if not slot_hash:
+                return default
+            if slot_hash == address_hash:
+                entry_key, household = self._entry(offset, length)
+                if entry_key == key:
+                    return household
+            slot = (slot + 1) % self._slots
+
+    def __getitem__(self, address):
+        household = self.get(address)
+        if household is None:
+            raise KeyError(address)
+        return household
+
+    def __contains__(self, address):
+        return self.get(address) is not None
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return (key for key, _ in self.households())
+
+    def households(self, min_size=1):
+        """
+        Return the households with at least min_size clients.
+
+        :param min_size: minimum number of clients (2 for shared addresses)
+        :return: (normalised address, clients) pairs
+        :rtype: iterator of tuples
+        """
+
+        for slot in range(self._slots):
+            slot_hash, offset, length = _SLOT.unpack_from(self._map, _HEADER.size + slot * _SLOT.size)
+            if slot_hash:
+                key, household = self._entry(offset, length)
+                if len(household) >= min_size:
+                    yield key, household
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _entry(self, offset, length):
+        start = self._blob + offset
+        key, household = json.loads(self._map[start:start + length].decode('utf-8'))
+        return key, [tuple(entry) for entry in household]
 
-    for client in segment:
-        if client.get('address'):
-            details = defaultdict(lambda: None)
-            details.update(client)
-            name = ' '.join(
-                filter(None, (details['title'], details['first-name'], details['middle-name'], details['last-name'])))
-            marketing_list.append((name, details['address']))
 
-    return marketing_list
+def _address_hash(key):
+    # 0 marks the empty slots.
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little') or 1
@@ -4,6 +4,13 @@ DATA PROCESSING
 DO NOT MODIFY CONSTANTS
 """
 
+import weakref
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 PRICES_PER_HOUR_PER_DAY_SAMPLE = [
     # Prices for business hours on Monday
     [11300, 12000, 12100, 12100, 11800, 11100, 10300, 9400],
@@ -45,9 +52,7 @@ def normalize_prices(prices):
     :rtype: list
     """
 
-    num_prices_per_day = {len(sample) for sample in prices}
-    if len(num_prices_per_day) != 1:
-        raise ValueError("Each day must have the same number of samples")
+    _check_days(prices)
 
     weight = 100 / prices[0][0]
 
@@ -69,8 +74,139 @@ def flip_prices(prices):
     :rtype: list
     """
 
+    _check_days(prices)
+
+    return list(map(list, zip(*prices)))
+
+
+class PriceMatrix:
+    """
+    Prices (one row per day, one column per hour) backed by a 2-D NumPy
+    array, for series too long to copy into new lists on every operation.
+
+    flip() returns a transposed view of the same data rather than a copy.
+    normalize() either rescales the data in place or returns a view that
+    shares the data and only records the scale factor; the scaled values
+    are computed when they are read (values, tolist(), np.asarray).
+
+    The matrices returned by flip() and normalize() keep track of each
+    other, so rescaling in place never changes what the other views read:
+    while any of them is alive, normalize(inplace=True) rescales a copy
+    of the data instead.
+
+    E.g., PriceMatrix.from_lists([[1, 2], [3, 4]]).normalize().tolist() is
+    [[100.0, 200.0], [300.0, 400.0]]
+
+    :param prices: 2-D array of prices, used without copying if it is
+    already a float array
+    :param scale: factor applied to the prices when they are read
+    :raise ImportError: if NumPy is not installed
+    :raise ValueError: if the days do not all have the same number of
+    prices, or the prices are not 2-D
+    """
+
+    def __init__(self, prices, scale=1.0):
+        if np is None:
+            raise ImportError("PriceMatrix requires NumPy")
+
+        if not isinstance(prices, np.ndarray):
+            _check_days(prices)
+
+        self.data = np.asarray(prices, dtype=float)
+        if self.data.ndim != 2:
+            raise ValueError("Each day must have the same number of samples")
+        self.scale = scale
+        self._views = weakref.WeakSet([self])
+
+    @classmethod
+    def from_lists(cls, prices):
+        """
+        Build a matrix from a list (for days) of lists (for hours) of prices,
+        as taken by normalize_prices and flip_prices.
+
+        :param prices: list of list of prices
+        :return: matrix holding a contiguous copy of the prices
+        :rtype: PriceMatrix
+        :raise ValueError: if the days do not all have the same number of
+        prices
+        """
+
+        _check_days(prices)
+
+        return cls(np.array(prices, dtype=float))
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def values(self):
+        """Scaled prices, as an array (the data itself if the scale is 1)."""
+
+        return self.data if self.scale == 1 else self.data * self.scale
+
+    def tolist(self):
+        """
+        :return: list (for rows) of list (for columns) of scaled prices
+        :rtype: list
+        """
+
+        return self.values.tolist()
+
+    def flip(self):
+        """
+        Swap days and hours, as flip_prices does, without copying the data.
+
+        :return: view (for hours) of views (for days) of the same prices
+        :rtype: PriceMatrix
+        """
+
+        return self._view(self.data.T, self.scale)
+
+    def normalize(self, inplace=False):
+        """
+        Scale the prices so that the first one is worth 100, as
+        normalize_prices does.
+
+        :param inplace: rescale the data itself instead of returning a
+        scaled view (the data is copied first if other views share it)
+        :return: the normalised matrix (self if inplace)
+        :rtype: PriceMatrix
+        """
+
+        weight = 100 / (float(self.data[0, 0]) * self.scale)
+
+        if not inplace:
+            return self._view(self.data, self.scale * weight)
+
+        if len(self._views) > 1:
+            self._views.discard(self)
+            self._views = weakref.WeakSet([self])
+            self.data = self.data * (self.scale * weight)
+        else:
+            self.data *= self.scale * weight
+        self.scale = 1.0
+
+        return self
+
+    def _view(self, data, scale):
+        view = PriceMatrix(data, scale)
+        view._views = self._views
+        self._views.add(view)
+        return view
+
+    def __array__(self, dtype=None, copy=None):
+        values = self.values
+        return values if dtype is None else values.astype(dtype, copy=False)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return f'PriceMatrix({self.shape[0]} x {self.shape[1]}, scale={self.scale:g})'
+
+
+def _check_days(prices):
     num_prices_per_day = {len(sample) for sample in prices}
     if len(num_prices_per_day) != 1:
         raise ValueError("Each day must have the same number of samples")
-
-    return list(map(list, zip(*prices)))
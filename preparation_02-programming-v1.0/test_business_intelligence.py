@@ -0,0 +1,54 @@
+import random
+
+import numpy as np
+import pytest
+
+from business_intelligence import minimum_profitable_volume, minimum_profitable_volumes, write_break_even_grid
+
+
+@pytest.mark.parametrize('sell_price, expected', [(1020, 1), (1019, 2), (600, 2), (30, 100), (21, 1000), (20, None)])
+def test_minimum_profitable_volume(sell_price, expected):
+    assert minimum_profitable_volume(sell_price, 1000, 20) == expected
+
+
+def test_volumes_equal_scalar_function():
+    rng = random.Random(0)
+    scenarios = [(rng.randint(1, 500), rng.randint(0, 10 ** 6), rng.randint(1, 500)) for _ in range(1000)]
+    sell_price, fixed_cost, cost_per_unit = map(list, zip(*scenarios))
+
+    volumes = minimum_profitable_volumes(sell_price, fixed_cost, cost_per_unit)
+
+    assert volumes.tolist() == [minimum_profitable_volume(*scenario) for scenario in scenarios]
+
+
+def test_volumes_docstring_example():
+    volumes = minimum_profitable_volumes([1020, 1019, 20], 1000, 20)
+
+    assert volumes.tolist() == [1.0, 2.0, None]
+
+
+def test_volumes_grid():
+    sell_prices = [15, 25, 1020]
+    fixed_costs = [0, 1000]
+    costs_per_unit = [10, 20]
+
+    grid = minimum_profitable_volumes(sell_prices, fixed_costs, costs_per_unit, grid=True)
+
+    assert grid.shape == (3, 2, 2)
+    for (i, j, k), volume in np.ndenumerate(grid.filled(np.nan)):
+        expected = minimum_profitable_volume(sell_prices[i], fixed_costs[j], costs_per_unit[k])
+        assert (np.isnan(volume) and expected is None) or volume == expected
+
+
+@pytest.mark.parametrize('chunk_bytes', [1, 100, 64 * 1024 ** 2])
+def test_write_break_even_grid(tmp_path, chunk_bytes):
+    path = str(tmp_path / 'grid.npy')
+    sell_prices = np.linspace(1, 100, 37)
+    fixed_costs = np.linspace(0, 5000, 11)
+    costs_per_unit = np.linspace(1, 80, 9)
+
+    shape = write_break_even_grid(path, sell_prices, fixed_costs, costs_per_unit, chunk_bytes=chunk_bytes)
+
+    assert shape == (37, 11, 9)
+    expected = minimum_profitable_volumes(sell_prices, fixed_costs, costs_per_unit, grid=True).filled(np.nan)
+    np.testing.assert_array_equal(np.load(path, mmap_mode='r'), expected)
@@ -0,0 +1,159 @@
+import json
+
+import pytest
+
+import customers
+from customers import (CLIENTS_EXAMPLE, HouseholdIndex, MappedHouseholdIndex, iter_clients, normalise_address,
+                       process_clients, read_jsonl)
+
+ELSA = ('Princess Elsa Frost', '33 Castle Street, London')
+ANNA = ('Princess Anna Frost', '34 Castle Street, London')
+
+
+def _segment(count):
+    segment = []
+    for i in range(count):
+        client = dict(CLIENTS_EXAMPLE[i % len(CLIENTS_EXAMPLE)])
+        client['first-name'] = f'{client["first-name"]}{i}'
+        if i % 5 == 0:
+            client.pop('title', None)
+        if i % 7 == 0:
+            client['address'] = ''
+        segment.append(client)
+    return segment
+
+
+def _write_jsonl(path, segment):
+    with open(path, 'w', encoding='utf-8') as output:
+        for client in segment:
+            output.write(json.dumps(client) + '\n')
+        output.write('\n')
+
+
+def test_process_clients_example():
+    assert process_clients(CLIENTS_EXAMPLE) == [ELSA, ANNA]
+
+
+def test_process_clients_does_not_modify_records():
+    segment = [{'first-name': 'Olaf', 'address': 'Arendelle'}]
+    assert process_clients(segment) == [('Olaf', 'Arendelle')]
+    assert segment == [{'first-name': 'Olaf', 'address': 'Arendelle'}]
+
+
+def test_iter_clients_reads_jsonl_lazily(tmp_path):
+    segment = _segment(50)
+    path = tmp_path / 'clients.jsonl'
+    _write_jsonl(path, segment)
+
+    assert list(iter_clients(str(path))) == process_clients(segment)
+    assert list(iter_clients(path)) == process_clients(segment)
+    assert list(read_jsonl(path)) == segment
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 1000])
+def test_iter_clients_workers_keep_order(tmp_path, chunk_size):
+    segment = _segment(200)
+    path = tmp_path / 'clients.jsonl'
+    _write_jsonl(path, segment)
+
+    expected = process_clients(segment)
+    assert list(iter_clients(path, workers=2, chunk_size=chunk_size)) == expected
+    assert list(iter_clients(iter(segment), workers=2, chunk_size=chunk_size)) == expected
+    assert list(iter_clients([], workers=2)) == []
+
+
+def test_normalise_address():
+    assert normalise_address(' 33  Castle Street,London ') == '33 castle street london'
+    assert normalise_address('33 CASTLE STREET, LONDON') == '33 castle street london'
+
+
+def test_household_index_lookups():
+    index = HouseholdIndex(CLIENTS_EXAMPLE)
+
+    assert len(index) == 2
+    assert index['33 castle street, LONDON'] == [ELSA]
+    assert index.get('nowhere') is None
+    assert '34 Castle Street London' in index
+    assert 'nowhere' not in index
+    with pytest.raises(KeyError):
+        index['nowhere']
+
+
+def test_household_index_add_remove():
+    index = HouseholdIndex(CLIENTS_EXAMPLE)
+    olaf = {'first-name': 'Olaf', 'address': '33 Castle Street,London'}
+
+    assert index.add(olaf) == '33 castle street london'
+    assert index.add(CLIENTS_EXAMPLE[3]) is None
+    assert dict(index.households(min_size=2)) == {'33 castle street london': [ELSA, ('Olaf', olaf['address'])]}
+
+    index.remove(CLIENTS_EXAMPLE[1])
+    assert '34 castle street london' not in index
+    with pytest.raises(KeyError):
+        index.remove(CLIENTS_EXAMPLE[1])
+    with pytest.raises(KeyError):
+        index.remove(CLIENTS_EXAMPLE[3])
+
+    index.remove(olaf)
+    assert index['33 Castle Street, London'] == [ELSA]
+
+
+def test_household_index_from_jsonl(tmp_path):
+    segment = _segment(100)
+    path = tmp_path / 'clients.jsonl'
+    _write_jsonl(path, segment)
+
+    incremental = HouseholdIndex()
+    for client in segment:
+        incremental.add(client)
+
+    assert dict(HouseholdIndex(path).households()) == dict(incremental.households())
+
+
+def test_save_map_get_round_trip(tmp_path):
+    index = HouseholdIndex(_segment(100))
+    path = tmp_path / 'households.idx'
+    index.save(path)
+
+    with MappedHouseholdIndex(path) as mapped:
+        assert len(mapped) == len(index)
+        assert sorted(mapped) == sorted(index)
+        for key in index:
+            assert mapped[key] == index[key]
+            assert mapped.get(key.upper()) == index[key]
+        assert mapped.get('nowhere') is None
+        assert 'nowhere' not in mapped
+        assert dict(mapped.households(min_size=2)) == dict(index.households(min_size=2))
+
+    assert dict(HouseholdIndex.load(path).households()) == dict(index.households())
+
+
+def test_save_map_get_with_colliding_hashes(tmp_path, monkeypatch):
+    # Every address gets the same slot (and the same hash), so lookups have to probe and compare the keys.
+    monkeypatch.setattr(customers, '_address_hash', lambda key: 1)
+    index = HouseholdIndex(_segment(40))
+    path = tmp_path / 'households.idx'
+    index.save(path)
+
+    with MappedHouseholdIndex(path) as mapped:
+        for key in index:
+            assert mapped[key] == index[key]
+        assert mapped.get('nowhere') is None
+
+
+def test_save_map_empty_index(tmp_path):
+    path = tmp_path / 'households.idx'
+    HouseholdIndex().save(path)
+
+    with MappedHouseholdIndex(path) as mapped:
+        assert len(mapped) == 0
+        assert list(mapped) == []
+        assert mapped.get('33 Castle Street, London') is None
+
+
+def test_map_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'x' * 64)
+
+    with pytest.raises(ValueError):
+        MappedHouseholdIndex(path)
@@ -0,0 +1,83 @@
+import gc
+
+import numpy as np
+import pytest
+
+from data_processing import PRICES_PER_HOUR_PER_DAY_SAMPLE, PriceMatrix, flip_prices, normalize_prices
+
+PRICES = PRICES_PER_HOUR_PER_DAY_SAMPLE
+
+
+def test_matrix_equals_list_functions():
+    matrix = PriceMatrix.from_lists(PRICES)
+
+    assert matrix.shape == (5, 8) and len(matrix) == 5
+    assert matrix.tolist() == PRICES
+    assert matrix.flip().tolist() == flip_prices(PRICES)
+    assert matrix.normalize().tolist() == normalize_prices(PRICES)
+    assert matrix.normalize().flip().tolist() == flip_prices(normalize_prices(PRICES))
+    assert PriceMatrix.from_lists([[200, 20], [30, 400]]).normalize().tolist() == [[100, 10], [15, 200]]
+
+
+def test_flip_and_normalize_share_the_data():
+    data = np.array(PRICES, dtype=float)
+    matrix = PriceMatrix(data)
+
+    flipped = matrix.flip()
+    normalized = matrix.normalize()
+
+    assert matrix.data is data
+    assert np.shares_memory(flipped.data, data) and np.shares_memory(normalized.data, data)
+    assert normalized.scale == 100 / PRICES[0][0]
+    assert matrix.values is data
+    np.testing.assert_array_equal(np.asarray(normalized), normalize_prices(PRICES))
+    assert np.asarray(normalized, dtype=np.float32).dtype == np.float32
+
+
+def test_normalize_in_place_keeps_other_views():
+    matrix = PriceMatrix.from_lists(PRICES)
+    flipped = matrix.flip()
+
+    assert matrix.normalize(inplace=True) is matrix
+    assert matrix.tolist() == normalize_prices(PRICES)
+    assert matrix.scale == 1.0
+    # The view still reads the original prices, from the data the matrix no longer uses.
+    assert flipped.tolist() == flip_prices(PRICES)
+    assert not np.shares_memory(matrix.data, flipped.data)
+
+
+def test_normalize_in_place_without_other_views():
+    data = np.array(PRICES, dtype=float)
+    matrix = PriceMatrix(data)
+    matrix.flip()
+    gc.collect()
+
+    matrix.normalize(inplace=True)
+
+    assert matrix.data is data
+    np.testing.assert_array_equal(data, normalize_prices(PRICES))
+
+
+def test_normalize_in_place_of_a_view():
+    matrix = PriceMatrix.from_lists(PRICES)
+    normalized = matrix.normalize()
+
+    normalized.normalize(inplace=True)
+
+    assert normalized.tolist() == normalize_prices(PRICES)
+    assert matrix.tolist() == PRICES
+
+
+@pytest.mark.parametrize('prices', [[[1, 2], [3]], np.arange(3.0), [[[1]], [[2]]]])
+def test_matrix_validation(prices):
+    with pytest.raises(ValueError):
+        PriceMatrix(prices)
+
+
+def test_list_functions_validation():
+    with pytest.raises(ValueError):
+        PriceMatrix.from_lists([[1, 2], [3]])
+    with pytest.raises(ValueError):
+        normalize_prices([[1, 2], [3]])
+    with pytest.raises(ValueError):
+        flip_prices([[1, 2], [3]])